@@ -50,11 +50,51 @@ pattern_get_response = OpenApiExample(
         "collection_version": "1.0.0",
         "collection_version_uri": None,
         "pattern_name": "mypattern",
+        "title": "",
+        "short_description": "",
+        "schema_version": "",
+        "tags": [],
         "pattern_definition": None,
     },
     response_only=True,
 )
 
+pattern_list_response = OpenApiExample(
+    "Sample pattern list GET response",
+    value={
+        "id": 1,
+        "url": "/api/pattern-service/v1/patterns/1/",
+        "related": {},
+        "summary_fields": {},
+        "created": "2025-06-25T01:02:03Z",
+        "created_by": None,
+        "modified": "2025-06-25T01:02:03Z",
+        "modified_by": None,
+        "collection_name": "mynamespace.mycollection",
+        "collection_version": "1.0.0",
+        "collection_version_uri": None,
+        "pattern_name": "mypattern",
+        "title": "",
+        "short_description": "",
+        "schema_version": "",
+        "tags": [],
+    },
+    response_only=True,
+)
+
+pattern_summary_get_response = OpenApiExample(
+    "Sample pattern summary GET response",
+    value={
+        "id": 1,
+        "collection_name": "mynamespace.mycollection",
+        "collection_version": "1.0.0",
+        "pattern_name": "mypattern",
+        "title": "My pattern",
+        "tags": ["networking", "cisco"],
+    },
+    response_only=True,
+)
+
 pattern_post_request = OpenApiExample(
     "Sample pattern POST request",
     value={
@@ -74,6 +114,26 @@ pattern_post_response = OpenApiExample(
     response_only=True,
 )
 
+pattern_collection_post_request = OpenApiExample(
+    "Sample pattern collection POST request",
+    value={
+        "collection_name": "mynamespace.mycollection",
+        "collection_version": "1.0.0",
+    },
+    request_only=True,
+)
+
+pattern_collection_post_response = OpenApiExample(
+    "Sample pattern collection POST response",
+    value={
+        "message": (
+            "Collection pattern creation initiated. Check task status for progress."
+        ),
+        "task_id": 1,
+    },
+    response_only=True,
+)
+
 pattern_instance_get_response = OpenApiExample(
     "Sample pattern instance GET response",
     value={
@@ -143,3 +203,13 @@ task_get_response = OpenApiExample(
     },
     response_only=True,
 )
+
+task_status_get_response = OpenApiExample(
+    "Sample compact task GET response",
+    value={
+        "id": 1,
+        "status": "Running",
+        "modified": "2025-06-25T01:02:03Z",
+    },
+    response_only=True,
+)
@@ -0,0 +1,107 @@
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.management.base import CommandParser
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.pagination import Cursor
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+from core.models import Task
+from core.pagination import IdCursorPagination
+
+SEED_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    """Compares the latency of offset and cursor pagination of tasks."""
+
+    help = (
+        "Time reading the first and a deep page of tasks with offset and cursor "
+        "pagination. The tasks are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Number of tasks to create for the benchmark.",
+        )
+        parser.add_argument(
+            "--page-size", type=int, default=100, help="Number of tasks per page."
+        )
+        parser.add_argument(
+            "--page", type=int, default=10_000, help="Deep page to compare to page 1."
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times each page is read; the fastest run is reported.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows, page_size, page = options["rows"], options["page_size"], options["page"]
+        if rows < page * page_size:
+            raise CommandError(f"--rows must be at least {page * page_size}.")
+
+        with transaction.atomic():
+            self.stdout.write(f"Creating {rows} tasks...")
+            for start in range(0, rows, SEED_BATCH_SIZE):
+                Task.objects.bulk_create(
+                    Task(status=Task.Status.COMPLETED, details={})
+                    for _ in range(min(SEED_BATCH_SIZE, rows - start))
+                )
+
+            self.stdout.write(f"{'page':>8} {'offset (ms)':>12} {'cursor (ms)':>12}")
+            for number in (1, page):
+                timings = {
+                    name: min(self._time(paginate) for _ in range(options["repeat"]))
+                    for name, paginate in self._paginators(number, page_size).items()
+                }
+                self.stdout.write(
+                    f"{number:>8} {timings['offset'] * 1000:>12.2f} "
+                    f"{timings['cursor'] * 1000:>12.2f}"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(paginate: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        paginate()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _paginators(number: int, page_size: int) -> Dict[str, Callable[[], Any]]:
+        """Returns functions reading page ``number`` of the tasks."""
+        factory = RequestFactory()
+        queryset = Task.objects.all()
+        offset = (number - 1) * page_size
+
+        offset_request = Request(
+            factory.get("/", {"limit": page_size, "offset": offset})
+        )
+        cursor_url = replace_query_param("/", "page_size", page_size)
+        if offset:
+            # The cursor a client reaches the page with, from the previous page
+            paginator = IdCursorPagination()
+            paginator.base_url = cursor_url
+            last_id = queryset.order_by("id").values_list("id", flat=True)[offset - 1]
+            cursor_url = paginator.encode_cursor(Cursor(0, False, last_id))
+        cursor_request = Request(factory.get(cursor_url))
+
+        return {
+            "offset": lambda: LimitOffsetPagination().paginate_queryset(
+                queryset, offset_request
+            ),
+            "cursor": lambda: IdCursorPagination().paginate_queryset(
+                queryset, cursor_request
+            ),
+        }
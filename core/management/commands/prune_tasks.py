@@ -0,0 +1,51 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from core.utils.retention import prune_tasks
+
+
+class Command(BaseCommand):
+    """Archives and deletes completed and failed tasks past their retention."""
+
+    help = "Archive and delete completed and failed tasks older than a given age."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=settings.TASK_RETENTION_DAYS,
+            help="Delete tasks last modified more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASK_PRUNE_BATCH_SIZE,
+            help="Maximum number of tasks deleted per transaction.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.TASK_ARCHIVE_DIR,
+            help="Directory to archive the tasks to before deleting them.",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Delete the tasks without archiving them.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        result = prune_tasks(
+            timedelta(days=options["days"]),
+            batch_size=options["batch_size"],
+            archive_dir=None if options["no_archive"] else options["archive_dir"],
+        )
+        self.stdout.write(
+            f"Deleted {result.deleted} tasks in {result.seconds:.2f}s "
+            f"({result.rows_per_second:.0f} rows/s)."
+        )
+        if result.archive_path:
+            self.stdout.write(f"Archived to {result.archive_path}.")
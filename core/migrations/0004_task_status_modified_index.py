@@ -0,0 +1,20 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:00
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_task"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "modified"], name="core_task_status_modified"
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:07
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db import models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def copy_catalog_fields(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    Pattern = apps.get_model("core", "Pattern")
+    patterns = list(Pattern.objects.exclude(pattern_definition=None))
+    for pattern in patterns:
+        definition = pattern.pattern_definition
+        if not isinstance(definition, dict):
+            continue
+        # Truncated to the columns, like Pattern.set_definition
+        pattern.title = str(definition.get("title") or "")[:200]
+        pattern.short_description = str(definition.get("short_description") or "")
+        pattern.schema_version = str(definition.get("schema_version") or "")[:50]
+        tags = definition.get("tags")
+        pattern.tags = [str(tag) for tag in tags] if isinstance(tags, list) else []
+    Pattern.objects.bulk_update(
+        patterns, ["title", "short_description", "schema_version", "tags"]
+    )
+
+
+def create_tags_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    # Serves the tags__contains lookups of the pattern search
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX core_pattern_tags_gin ON core_pattern "
+            "USING gin (tags jsonb_path_ops)"
+        )
+
+
+def drop_tags_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS core_pattern_tags_gin")
+
+
+# Columns matched by the ?q= search of the pattern list
+SEARCH_COLUMNS = ["title", "short_description", "pattern_name"]
+
+
+def create_search_indexes(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    # Serves the icontains lookups of the pattern search, which Django runs as
+    # UPPER(column::text) LIKE UPPER('%q%'): a B-tree index can't be used for
+    # those, a trigram index on the same expression can
+    if schema_editor.connection.vendor == "postgresql":
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX core_pattern_{column}_trgm ON core_pattern "
+                f"USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+            )
+
+
+def drop_search_indexes(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    if schema_editor.connection.vendor == "postgresql":
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS core_pattern_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_task_status_modified_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pattern",
+            name="schema_version",
+            field=models.CharField(blank=True, default="", max_length=50),
+        ),
+        migrations.AddField(
+            model_name="pattern",
+            name="short_description",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="pattern",
+            name="tags",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="pattern",
+            name="title",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.RunPython(copy_catalog_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_tags_index, drop_tags_index),
+        # Only runs on Postgres. Creating the extension needs a superuser, or
+        # CREATE privilege on the database (pg_trgm is a trusted extension
+        # since Postgres 13); otherwise have an administrator create it first
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -7,6 +7,8 @@ from typing import Optional
 from ansible_base.lib.abstract_models import CommonModel
 from django.db import models
 
+from .utils.task_events import notify_task_status
+
 
 class Pattern(CommonModel):
     class Meta:
@@ -27,6 +29,33 @@ class Pattern(CommonModel):
     pattern_name: models.CharField = models.CharField(max_length=200)
     pattern_definition: models.JSONField = models.JSONField(blank=True, null=True)
 
+    # Catalog metadata copied from the pattern definition, so patterns can be
+    # searched in the DB. On Postgres, tags also have a GIN index (see 0005).
+    title: models.CharField = models.CharField(max_length=200, blank=True, default="")
+    short_description: models.TextField = models.TextField(blank=True, default="")
+    schema_version: models.CharField = models.CharField(
+        max_length=50, blank=True, default=""
+    )
+    tags: models.JSONField = models.JSONField(blank=True, default=list)
+
+    CATALOG_FIELDS = ["title", "short_description", "schema_version", "tags"]
+
+    def set_definition(self, definition: Optional[Dict[str, Any]]) -> None:
+        """
+        Sets the pattern definition and the catalog fields read from it.
+
+        The pattern schema doesn't bound every catalog value, so values longer
+        than their column are truncated; the definition keeps them in full.
+        """
+        self.pattern_definition = definition
+        definition = definition or {}
+        for field in ("title", "short_description", "schema_version"):
+            value = str(definition.get(field) or "")
+            max_length = self._meta.get_field(field).max_length
+            setattr(self, field, value[:max_length] if max_length else value)
+        tags = definition.get("tags")
+        self.tags = [str(tag) for tag in tags] if isinstance(tags, list) else []
+
 
 class ControllerLabel(CommonModel):
     class Meta:
@@ -88,6 +117,11 @@ class Task(CommonModel):
     class Meta:
         app_label = "core"
         ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["status", "modified"], name="core_task_status_modified"
+            ),
+        ]
 
     class Status(models.TextChoices):
         INITIATED = "Initiated"
@@ -124,7 +158,8 @@ class Task(CommonModel):
         self.status = new_status
         self.details = details or {}
         if save_immediately:
-            self.save(update_fields=["status", "details"])
+            self.save(update_fields=["status", "details", "modified"])
+            notify_task_status(self.pk, self.status)
 
     def mark_initiated(self, details: Optional[Dict[str, Any]] = None) -> None:
         self.set_status(self.Status.INITIATED, details)
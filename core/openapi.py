@@ -0,0 +1,86 @@
+import copy
+from typing import Any
+from typing import Dict
+
+from django.conf import settings
+
+TASK_DETAIL_PATH = "tasks/{id}/"
+
+
+def add_task_wait_paths(result: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+    """
+    Adds the task wait and event stream endpoints to the OpenAPI schema.
+
+    They are plain async Django views, which the schema generator only sees
+    through DRF, so they are described here after the task detail operation.
+    Registered in SPECTACULAR_SETTINGS["POSTPROCESSING_HOOKS"].
+    """
+    prefix = settings.SPECTACULAR_SETTINGS["SCHEMA_PATH_PREFIX"]
+    detail = result["paths"].get(f"{prefix}{TASK_DETAIL_PATH}", {}).get("get")
+    if detail is None:
+        return result
+
+    common = {
+        "tags": detail["tags"],
+        "security": detail["security"],
+    }
+    id_parameter = copy.deepcopy(detail["parameters"][0])
+    not_found = {"description": "The task does not exist."}
+
+    result["paths"][f"{prefix}{TASK_DETAIL_PATH}wait/"] = {
+        "get": {
+            "operationId": "tasks_wait_retrieve",
+            "description": (
+                "Wait for a task to finish. Responds as soon as the task is "
+                "Completed or Failed, or with its current state once the "
+                "timeout expires."
+            ),
+            "parameters": [
+                id_parameter,
+                {
+                    "in": "query",
+                    "name": "timeout",
+                    "schema": {
+                        "type": "number",
+                        "default": settings.TASK_WAIT_DEFAULT_TIMEOUT,
+                        "maximum": settings.TASK_WAIT_MAX_TIMEOUT,
+                    },
+                    "description": "Maximum number of seconds to wait.",
+                },
+            ],
+            **common,
+            "responses": {
+                "200": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Task"}
+                        }
+                    },
+                    "description": "",
+                },
+                "400": {"description": "The timeout is not a finite number."},
+                "404": not_found,
+            },
+        }
+    }
+    result["paths"][f"{prefix}{TASK_DETAIL_PATH}events/"] = {
+        "get": {
+            "operationId": "tasks_events_retrieve",
+            "description": (
+                "Stream the status changes of a task as server-sent events. "
+                "Each event is named after the task status in lower case and "
+                "carries the task as JSON data. The stream ends once the task "
+                "is Completed or Failed."
+            ),
+            "parameters": [id_parameter],
+            **common,
+            "responses": {
+                "200": {
+                    "content": {"text/event-stream": {"schema": {"type": "string"}}},
+                    "description": "",
+                },
+                "404": not_found,
+            },
+        }
+    }
+    return result
@@ -0,0 +1,28 @@
+from typing import Optional
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Opt-in keyset pagination on the primary key.
+
+    Lists are only paginated when the request has a ``cursor`` or
+    ``page_size`` query parameter, so existing clients keep getting plain
+    lists. A page is read with ``WHERE id > <last id> ORDER BY id LIMIT n``,
+    which costs the same however deep it is, and there is no COUNT(*): the
+    response only has opaque ``next`` and ``previous`` links.
+    """
+
+    ordering = "id"
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_page_size(self, request: Request) -> Optional[int]:
+        opt_in = {self.cursor_query_param, self.page_size_query_param}
+        if not opt_in & request.query_params.keys():
+            return None
+        return super().get_page_size(request)
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+from typing import Any
+from typing import Iterable
+from typing import Optional
+
 from ansible_base.lib.serializers.common import CommonModelSerializer
+from rest_framework import serializers
 
 from .models import Automation
 from .models import ControllerLabel
@@ -10,6 +15,20 @@ from .models import Task
 
 
 class PatternSerializer(CommonModelSerializer):
+    """
+    Args:
+        fields: Names of the fields to serialize, for sparse fieldsets.
+            All the fields are serialized when None.
+    """
+
+    def __init__(
+        self, *args: Any, fields: Optional[Iterable[str]] = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta(CommonModelSerializer.Meta):
         model = Pattern
         fields = CommonModelSerializer.Meta.fields + [
@@ -18,9 +37,40 @@ class PatternSerializer(CommonModelSerializer):
             "collection_version",
             "collection_version_uri",
             "pattern_name",
+            "title",
+            "short_description",
+            "schema_version",
+            "tags",
+            "pattern_definition",
+        ]
+        read_only_fields = [
+            "title",
+            "short_description",
+            "schema_version",
+            "tags",
             "pattern_definition",
+            "collection_version_uri",
+        ]
+
+
+class PatternSummarySerializer(serializers.ModelSerializer):
+    """Summary projection of a pattern, for catalogs listing many patterns."""
+
+    class Meta:
+        model = Pattern
+        fields = [
+            "id",
+            "collection_name",
+            "collection_version",
+            "pattern_name",
+            "title",
+            "tags",
         ]
-        read_only_fields = ["pattern_definition", "collection_version_uri"]
+
+
+class PatternCollectionSerializer(serializers.Serializer):
+    collection_name = serializers.CharField(max_length=200)
+    collection_version = serializers.CharField(max_length=50)
 
 
 class ControllerLabelSerializer(CommonModelSerializer):
@@ -68,3 +118,11 @@ class TaskSerializer(CommonModelSerializer):
             "status",
             "details",
         ]
+
+
+class TaskStatusSerializer(serializers.ModelSerializer):
+    """Compact projection of a task, for polling the status of many tasks."""
+
+    class Meta:
+        model = Task
+        fields = ["id", "status", "modified"]
@@ -1,28 +1,53 @@
 import json
 import logging
-import os
-from contextlib import closing
+import time
+from datetime import timedelta
+from typing import cast
 
+from dispatcherd.publish import task as dispatcher_task
+from django.conf import settings
+from django.db import transaction
+from requests.exceptions import RequestException
+
+from core.utils.cache import get_provisioning_plan_cache
+from core.utils.cache import get_role_definition_cache
 from core.utils.controller import assign_execute_roles
 from core.utils.controller import build_collection_uri
 from core.utils.controller import create_execution_environment
 from core.utils.controller import create_job_templates
 from core.utils.controller import create_labels
 from core.utils.controller import create_project
-from core.utils.controller import download_collection
-from core.utils.controller import get_http_session
+from core.utils.controller import get_pool_stats
+from core.utils.controller import get_project_sync_statuses
+from core.utils.controller import get_provisioning_plan
+from core.utils.controller import get_shared_session
+from core.utils.controller import read_collection_files
+from core.utils.controller import save_collection_patterns
 from core.utils.controller import save_instance_state
+from core.utils.dag import Step
+from core.utils.dag import run_steps
+from core.utils.pattern_schema import PatternValidationError
+from core.utils.pattern_schema import validate_pattern_definition
+from core.utils.progress import TaskProgress
+from core.utils.retention import prune_tasks
 
+from .models import ControllerLabel
 from .models import Pattern
 from .models import PatternInstance
 from .models import Task
+from .tasks import DISPATCHERD_DEFAULT_CHANNEL
+from .tasks import submit_on_commit
 
 logger = logging.getLogger(__name__)
 
+WAITING_FOR_PROJECT_SYNC = "Waiting for project sync"
+PROJECT_SYNCED = "Project synced"
+
 
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
 def run_pattern_task(pattern_id: int, task_id: int) -> None:
     """
-    Orchestrates downloading a collection and saving a pattern definition.
+    Orchestrates reading a pattern definition from its collection and saving it.
 
     Args:
         pattern_id (int): The ID of the pattern to process.
@@ -37,62 +62,317 @@ def run_pattern_task(pattern_id: int, task_id: int) -> None:
     try:
         pattern = Pattern.objects.get(id=pattern_id)
         task.mark_running({"info": "Processing pattern"})
-        with download_collection(
-            pattern.collection_name, pattern.collection_version
-        ) as collection_path:
-            path_to_definition = os.path.join(
-                collection_path,
-                "extensions",
-                "patterns",
-                pattern.pattern_name,
-                "meta",
-                "pattern.json",
-            )
-            with open(path_to_definition, "r") as file:
-                definition = json.load(file)
+        # Tarball member names always use "/", whatever the OS
+        path_to_definition = (
+            f"extensions/patterns/{pattern.pattern_name}/meta/pattern.json"
+        )
+        files = read_collection_files(
+            pattern.collection_name, pattern.collection_version, [path_to_definition]
+        )
+        if path_to_definition not in files:
+            raise FileNotFoundError(path_to_definition)
 
-            pattern.pattern_definition = definition
-            pattern.collection_version_uri = build_collection_uri(
-                pattern.collection_name, pattern.collection_version
-            )
-            pattern.save(update_fields=["pattern_definition", "collection_version_uri"])
+        definition = json.loads(files[path_to_definition])
+        validate_pattern_definition(definition, pattern.pattern_name)
+        pattern.set_definition(definition)
+        pattern.collection_version_uri = build_collection_uri(
+            pattern.collection_name, pattern.collection_version
+        )
+        pattern.save(
+            update_fields=[
+                "pattern_definition",
+                "collection_version_uri",
+                *Pattern.CATALOG_FIELDS,
+                # Keys the provisioning plan cache, see get_provisioning_plan()
+                "modified",
+            ]
+        )
         task.mark_completed({"info": "Pattern processed successfully"})
     except FileNotFoundError:
         logger.error(f"Could not find pattern definition for task {task_id}")
         task.mark_failed({"error": "Pattern definition not found."})
+    except PatternValidationError as e:
+        logger.error(f"Task {task_id}: {e}")
+        task.mark_failed(
+            {"error": "Pattern definition is invalid.", "validation_errors": e.errors}
+        )
     except Exception as e:
         error_message = f"An unexpected error occurred {str(e)}."
         logger.exception(f"Task {task_id} failed unexpectedly.")
         task.mark_failed({"error": error_message})
 
 
-def run_pattern_instance_task(instance_id: int, task_id: int) -> None:
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
+def run_pattern_collection_task(
+    collection_name: str, collection_version: str, task_id: int
+) -> None:
+    """
+    Reads every pattern definition in a collection version from a single
+    download and creates or updates the matching patterns.
+
+    Args:
+        collection_name (str): The name of the collection.
+        collection_version (str): The version of the collection.
+        task_id (int): The ID of the task.
+    """
     task = Task.objects.get(id=task_id)
+    task.mark_initiated({"info": "Processing started"})
+    try:
+        task.mark_running({"info": "Processing collection patterns"})
+        files = read_collection_files(
+            collection_name,
+            collection_version,
+            ["extensions/patterns/*/meta/pattern.json"],
+        )
+        if not files:
+            raise FileNotFoundError(f"{collection_name}-{collection_version}")
+
+        definitions = {
+            path.split("/")[2]: json.loads(content) for path, content in files.items()
+        }
+        invalid = {}
+        for name, definition in definitions.items():
+            try:
+                validate_pattern_definition(definition, name)
+            except PatternValidationError as e:
+                invalid[name] = e.errors
+        if invalid:
+            logger.error(
+                f"Task {task_id}: invalid pattern definitions {sorted(invalid)}"
+            )
+            # Nothing is saved, so the collection is never partially imported
+            task.mark_failed(
+                {
+                    "error": "Pattern definitions are invalid.",
+                    "validation_errors": invalid,
+                }
+            )
+            return
+        patterns = save_collection_patterns(
+            collection_name, collection_version, definitions
+        )
+        task.mark_completed(
+            {
+                "info": "Collection patterns processed successfully",
+                "patterns": sorted(pattern.id for pattern in patterns),
+            }
+        )
+    except FileNotFoundError:
+        logger.error(f"Could not find pattern definitions for task {task_id}")
+        task.mark_failed({"error": "Pattern definitions not found."})
+    except Exception as e:
+        error_message = f"An unexpected error occurred {str(e)}."
+        logger.exception(f"Task {task_id} failed unexpectedly.")
+        task.mark_failed({"error": error_message})
+
+
+def _get_instance(instance_id: int) -> PatternInstance:
+    # The definition is only read on a miss of the provisioning plan cache
+    instance: PatternInstance = (
+        PatternInstance.objects.select_related("pattern")
+        .defer("pattern__pattern_definition")
+        .get(id=instance_id)
+    )
+    return instance
+
+
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
+def run_pattern_instance_task(instance_id: int, task_id: int) -> None:
+    """
+    First phase of pattern instance provisioning.
+
+    Creates the controller project, execution environment and labels, saves
+    their IDs as a checkpoint in the task details and leaves the task waiting
+    for watch_project_syncs instead of waiting for the sync in this worker.
+
+    Args:
+        instance_id (int): The ID of the pattern instance to provision.
+        task_id (int): The ID of the task.
+    """
+    progress = TaskProgress(Task.objects.get(id=task_id))
     try:
-        instance = PatternInstance.objects.select_related("pattern").get(id=instance_id)
-        pattern = instance.pattern
-        pattern_def = pattern.pattern_definition
-
-        if not pattern_def:
-            raise ValueError("Pattern definition is missing.")
-
-        # Create a single session for all AAP calls
-        with closing(get_http_session()) as session:
-            task.mark_running({"info": "Creating controller project"})
-            project_id = create_project(session, instance, pattern)
-            task.mark_running({"info": "Creating execution environment"})
-            ee_id = create_execution_environment(session, instance, pattern_def)
-            task.mark_running({"info": "Creating labels"})
-            labels = create_labels(session, instance, pattern_def)
-            task.mark_running({"info": "Creating job templates"})
-            automations = create_job_templates(
-                session, instance, pattern_def, project_id, ee_id
+        instance = _get_instance(instance_id)
+        # Definitions saved before they were validated on ingestion are checked
+        # here, before any controller resource is created
+        plan = get_provisioning_plan(cast(Pattern, instance.pattern))
+
+        # Reuse the pooled session of this worker for all AAP calls
+        session = get_shared_session()
+        progress.start_stage("Creating controller resources")
+        # The EE and labels don't depend on the project, so they are created
+        # alongside it; job templates are created once the project has synced.
+        provisioning = run_steps(
+            [
+                Step("project", lambda: create_project(session, instance, plan)),
+                Step(
+                    "execution_environment",
+                    lambda: create_execution_environment(session, instance, plan),
+                ),
+                Step("labels", lambda: create_labels(session, instance, plan)),
+            ],
+            max_workers=settings.INSTANCE_PROVISIONING_CONCURRENCY,
+        )
+        checkpoint = {
+            "instance_id": instance_id,
+            "project_id": provisioning.results["project"],
+            "ee_id": provisioning.results["execution_environment"],
+            "label_ids": [label.id for label in provisioning.results["labels"]],
+            "durations": provisioning.durations,
+            "sync_started": time.time(),
+        }
+        # watch_project_syncs picks the task up from here
+        progress.start_stage(
+            WAITING_FOR_PROJECT_SYNC, flush=True, checkpoint=checkpoint
+        )
+    except PatternValidationError as e:
+        logger.error(f"Task {task_id}: {e}")
+        progress.fail(str(e), validation_errors=e.errors)
+    except Exception as e:
+        logger.exception("Failed to process PatternInstance.")
+        progress.fail(str(e))
+
+
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
+def watch_project_syncs() -> None:
+    """
+    Checks the projects of all pattern instances waiting for a project sync
+    with batched list requests, and wakes up the instances whose project
+    reached a terminal state.
+
+    Scheduled by dispatcherd every PROJECT_SYNC_POLL_INTERVAL seconds, so the
+    controller sees a constant request rate however many instances are being
+    provisioned at the same time. The controller is queried outside of any
+    transaction; only the tasks still waiting afterwards are locked and
+    updated. Instances whose resume was never picked up are failed after
+    PROJECT_SYNC_TIMEOUT seconds too.
+    """
+    checkpoints = {
+        task_id: details["checkpoint"]
+        for task_id, details in Task.objects.filter(
+            status=Task.Status.RUNNING, details__info=WAITING_FOR_PROJECT_SYNC
+        ).values_list("id", "details")
+    }
+    statuses = {}
+    if checkpoints:
+        try:
+            statuses = get_project_sync_statuses(
+                get_shared_session(),
+                [checkpoint["project_id"] for checkpoint in checkpoints.values()],
             )
-            task.mark_running({"info": "Saving instance"})
-            save_instance_state(instance, project_id, ee_id, labels, automations)
-            task.mark_running({"info": "Assigning roles"})
-            assign_execute_roles(session, instance.executors, automations)
-            task.mark_completed({"info": "PatternInstance processed"})
+        except RequestException:
+            # The timeouts below still apply while the controller keeps failing
+            logger.exception("Could not check the project syncs.")
+
+    now = time.time()
+    with transaction.atomic():
+        tasks = Task.objects.select_for_update(skip_locked=True).filter(
+            status=Task.Status.RUNNING,
+            details__info__in=[WAITING_FOR_PROJECT_SYNC, PROJECT_SYNCED],
+        )
+        for task in tasks:
+            if task.details["info"] == PROJECT_SYNCED:
+                synced_at = task.details["stages"][-1]["start"]
+                if now - synced_at > settings.PROJECT_SYNC_TIMEOUT:
+                    TaskProgress(task).fail(
+                        f"Task was not resumed within {settings.PROJECT_SYNC_TIMEOUT} "
+                        "seconds of the project sync."
+                    )
+                continue
+            if task.id not in checkpoints:
+                # Started waiting after the projects were checked
+                continue
+
+            checkpoint = task.details["checkpoint"]
+            project_id = checkpoint["project_id"]
+            status = statuses.get(project_id)
+
+            if status == "successful":
+                logger.info(f"Project {project_id} synced, resuming task {task.id}.")
+                TaskProgress(task).start_stage(PROJECT_SYNCED, flush=True)
+                submit_on_commit(
+                    resume_pattern_instance_task, checkpoint["instance_id"], task.id
+                )
+            elif status in ("failed", "error", "canceled"):
+                TaskProgress(task).fail(
+                    f"Project {project_id} sync failed with status: '{status}'."
+                )
+            elif now - checkpoint["sync_started"] > settings.PROJECT_SYNC_TIMEOUT:
+                TaskProgress(task).fail(
+                    f"Project {project_id} failed to sync within "
+                    f"{settings.PROJECT_SYNC_TIMEOUT} seconds."
+                )
+
+
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
+def resume_pattern_instance_task(instance_id: int, task_id: int) -> None:
+    """
+    Second phase of pattern instance provisioning, submitted by
+    watch_project_syncs once the project has synced. Resumes provisioning
+    from the checkpoint saved by run_pattern_instance_task.
+
+    Does nothing if the task isn't waiting to be resumed anymore, e.g. when
+    it was failed by watch_project_syncs for being resumed too late.
+
+    Args:
+        instance_id (int): The ID of the pattern instance being provisioned.
+        task_id (int): The ID of the task.
+    """
+    with transaction.atomic():
+        task = Task.objects.select_for_update().get(id=task_id)
+        if (
+            task.status != Task.Status.RUNNING
+            or task.details.get("info") != PROJECT_SYNCED
+        ):
+            logger.warning(f"Task {task_id} is not waiting to be resumed, skipping.")
+            return
+        progress = TaskProgress(task)
+        # Written at once, as the first stage of a new TaskProgress
+        progress.start_stage("Creating job templates")
+    try:
+        checkpoint = progress.details["checkpoint"]
+        session = get_shared_session()
+        instance = _get_instance(instance_id)
+        plan = get_provisioning_plan(cast(Pattern, instance.pattern))
+        labels = list(ControllerLabel.objects.filter(id__in=checkpoint["label_ids"]))
+
+        automations = create_job_templates(
+            session,
+            instance,
+            plan,
+            checkpoint["project_id"],
+            checkpoint["ee_id"],
+        )
+        progress.start_stage("Saving instance")
+        save_instance_state(
+            instance, checkpoint["project_id"], checkpoint["ee_id"], labels, automations
+        )
+        progress.start_stage("Assigning roles")
+        assign_execute_roles(session, instance.executors, automations)
+        progress.complete(
+            "PatternInstance processed", durations=checkpoint["durations"]
+        )
+        logger.debug(f"AAP connection pools: {get_pool_stats()}")
+        logger.debug(
+            f"Role definition cache: {get_role_definition_cache().stats.as_dict()}"
+        )
+        logger.debug(
+            "Provisioning plan cache: "
+            f"{get_provisioning_plan_cache().stats.as_dict()}"
+        )
     except Exception as e:
         logger.exception("Failed to process PatternInstance.")
-        task.mark_failed({"error": str(e)})
+        progress.fail(str(e))
+
+
+@dispatcher_task(queue=DISPATCHERD_DEFAULT_CHANNEL, decorate=False)
+def prune_old_tasks() -> None:
+    """
+    Archives and deletes the completed and failed tasks older than
+    TASK_RETENTION_DAYS. Scheduled by dispatcherd every TASK_PRUNE_INTERVAL
+    seconds.
+    """
+    prune_tasks(
+        timedelta(days=settings.TASK_RETENTION_DAYS),
+        batch_size=settings.TASK_PRUNE_BATCH_SIZE,
+        archive_dir=settings.TASK_ARCHIVE_DIR,
+    )
@@ -0,0 +1,17 @@
+from typing import Any
+from typing import Callable
+
+from dispatcherd.publish import submit_task
+from django.db import transaction
+
+DISPATCHERD_DEFAULT_CHANNEL = "pattern-service-tasks"
+
+
+def submit_on_commit(fn: Callable[..., Any], *args: Any) -> None:
+    """
+    Publishes a dispatcherd task once the current transaction commits, so the
+    worker never runs before the rows it needs are visible.
+    """
+    transaction.on_commit(
+        lambda: submit_task(fn, queue=DISPATCHERD_DEFAULT_CHANNEL, args=args)
+    )
@@ -3,6 +3,15 @@ from rest_framework.test import APIClient
 
 from core import api_examples
 from core import models
+from core.utils.cache import get_provisioning_plan_cache
+
+
+@pytest.fixture(autouse=True)
+def provisioning_plan_cache():
+    """Gives every test an empty provisioning plan cache."""
+    get_provisioning_plan_cache.cache_clear()
+    yield get_provisioning_plan_cache()
+    get_provisioning_plan_cache.cache_clear()
 
 
 @pytest.fixture()
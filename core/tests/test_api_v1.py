@@ -1,8 +1,16 @@
+from unittest.mock import patch
+
 import pytest
+from django.contrib.auth import get_user_model
 from freezegun import freeze_time
 from rest_framework import status
 
 from core import api_examples
+from core import models
+from core.models import Task
+from core.task_runner import run_pattern_collection_task
+from core.task_runner import run_pattern_instance_task
+from core.task_runner import run_pattern_task
 
 
 @pytest.fixture(autouse=True)
@@ -47,6 +55,52 @@ def test_create_pattern_success(client, db):
     assert response.json() == api_examples.pattern_post_response.value
 
 
+@patch("core.tasks.submit_task")
+def test_create_pattern_submits_task_on_commit(
+    mock_submit_task, client, db, django_capture_on_commit_callbacks
+):
+    url = "/api/pattern-service/v1/patterns/"
+    data = api_examples.pattern_post_request.value
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        response = client.post(url, data, format="json")
+
+    assert len(callbacks) == 1
+    task = Task.objects.get(pk=response.json()["task_id"])
+    mock_submit_task.assert_called_once_with(
+        run_pattern_task,
+        queue="pattern-service-tasks",
+        args=(task.details["id"], task.id),
+    )
+
+
+def test_create_pattern_collection_success(client, db):
+    url = "/api/pattern-service/v1/patterns/collection/"
+    data = api_examples.pattern_collection_post_request.value
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json() == api_examples.pattern_collection_post_response.value
+
+
+@patch("core.tasks.submit_task")
+def test_create_pattern_collection_submits_task_on_commit(
+    mock_submit_task, client, db, django_capture_on_commit_callbacks
+):
+    url = "/api/pattern-service/v1/patterns/collection/"
+    data = api_examples.pattern_collection_post_request.value
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(url, data, format="json")
+
+    mock_submit_task.assert_called_once_with(
+        run_pattern_collection_task,
+        queue="pattern-service-tasks",
+        args=(
+            data["collection_name"],
+            data["collection_version"],
+            response.json()["task_id"],
+        ),
+    )
+
+
 def test_retrieve_pattern_success(client, pattern):
     url = f"/api/pattern-service/v1/patterns/{pattern.pk}/"
     response = client.get(url)
@@ -58,7 +112,83 @@ def test_list_patterns_success(client, pattern):
     url = "/api/pattern-service/v1/patterns/"
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == [api_examples.pattern_get_response.value]
+    assert response.json() == [api_examples.pattern_list_response.value]
+
+
+def test_list_patterns_defers_definition(client, pattern, django_assert_num_queries):
+    pattern.set_definition({"title": "My pattern", "tags": ["networking"]})
+    pattern.save()
+
+    with django_assert_num_queries(1) as captured:
+        response = client.get("/api/pattern-service/v1/patterns/")
+    assert response.status_code == status.HTTP_200_OK
+    assert "pattern_definition" not in captured.captured_queries[0]["sql"]
+
+
+def test_list_patterns_summary(client, pattern):
+    pattern.set_definition(
+        {
+            "title": "My pattern",
+            "tags": ["networking", "cisco"],
+            "aap_resources": {"controller_job_templates": []},
+        }
+    )
+    pattern.save()
+
+    response = client.get("/api/pattern-service/v1/patterns/?summary=true")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [api_examples.pattern_summary_get_response.value]
+
+
+@pytest.mark.parametrize(
+    "query, names",
+    [
+        ("tag=networking", ["routers", "switches"]),
+        ("tag=networking&tag=cisco", ["switches"]),
+        ("tag=cisc", []),
+        ("q=SWITCH", ["switches"]),
+        ("q=back+up", ["routers"]),
+        ("tag=networking&q=vlan", ["switches"]),
+        ("q=cloud", []),
+    ],
+)
+def test_search_patterns(client, db, query, names):
+    for name, definition in [
+        ("routers", {"title": "Back up routers", "tags": ["networking"]}),
+        (
+            "switches",
+            {
+                "title": "Configure switches",
+                "short_description": "Create VLANs",
+                "tags": ["networking", "cisco"],
+            },
+        ),
+        ("servers", {"title": "Patch servers", "tags": ["linux"]}),
+    ]:
+        pattern = models.Pattern(
+            collection_name="mynamespace.mycollection",
+            collection_version="1.0.0",
+            pattern_name=name,
+        )
+        pattern.set_definition(definition)
+        pattern.save()
+
+    response = client.get(f"/api/pattern-service/v1/patterns/?{query}&summary=true")
+    assert response.status_code == status.HTTP_200_OK
+    assert [pattern["pattern_name"] for pattern in response.json()] == names
+
+
+def test_list_patterns_fields(client, pattern):
+    url = "/api/pattern-service/v1/patterns/?fields=id,pattern_name"
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"id": pattern.pk, "pattern_name": "mypattern"}]
+
+
+@pytest.mark.parametrize("fields", ["pattern_definition", "id,nope"])
+def test_list_patterns_invalid_fields(client, pattern, fields):
+    response = client.get(f"/api/pattern-service/v1/patterns/?fields={fields}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
 def test_create_pattern_instance_success(client, pattern):
@@ -70,6 +200,23 @@ def test_create_pattern_instance_success(client, pattern):
     assert response.json() == api_examples.pattern_instance_post_response.value
 
 
+@patch("core.tasks.submit_task")
+def test_create_pattern_instance_submits_task_on_commit(
+    mock_submit_task, client, pattern, django_capture_on_commit_callbacks
+):
+    url = "/api/pattern-service/v1/pattern_instances/"
+    data = {**api_examples.pattern_instance_post_request.value, "pattern": pattern.pk}
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(url, data, format="json")
+
+    task = Task.objects.get(pk=response.json()["task_id"])
+    mock_submit_task.assert_called_once_with(
+        run_pattern_instance_task,
+        queue="pattern-service-tasks",
+        args=(task.details["id"], task.id),
+    )
+
+
 def test_retrieve_pattern_instance_success(client, controller_label, pattern_instance):
     pattern_instance.controller_labels.add(controller_label)
     url = f"/api/pattern-service/v1/pattern_instances/{pattern_instance.pk}/"
@@ -98,3 +245,101 @@ def test_list_tasks_success(client, task):
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == [api_examples.task_get_response.value]
+
+
+def test_list_tasks_compact_by_ids(client, task):
+    other = Task.objects.create(status="Completed", details={})
+    Task.objects.create(status="Running", details={})
+
+    url = f"/api/pattern-service/v1/tasks/?id__in={task.pk},{other.pk}&compact=true"
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        api_examples.task_status_get_response.value,
+        {"id": other.pk, "status": "Completed", "modified": "2025-06-25T01:02:03Z"},
+    ]
+
+
+def test_list_tasks_by_status(client, task):
+    Task.objects.create(status="Completed", details={})
+
+    response = client.get("/api/pattern-service/v1/tasks/?status=Running")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [api_examples.task_get_response.value]
+
+
+@pytest.mark.parametrize("query", ["id__in=1,two", "status=Sleeping"])
+def test_list_tasks_invalid_filters(client, task, query):
+    response = client.get(f"/api/pattern-service/v1/tasks/?{query}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def create_resources(count):
+    """Creates ``count`` of every resource, each with a creator and labels."""
+    user = get_user_model().objects.create(username="creator")
+    owned = {"created_by": user, "modified_by": user}
+    for i in range(count):
+        pattern = models.Pattern.objects.create(
+            collection_name="mynamespace.mycollection",
+            collection_version="1.0.0",
+            pattern_name=f"mypattern{i}",
+            pattern_definition={"title": f"Pattern {i}"},
+            **owned,
+        )
+        instance = models.PatternInstance.objects.create(
+            organization_id=1, pattern=pattern, credentials={}, executors={}, **owned
+        )
+        instance.controller_labels.add(
+            models.ControllerLabel.objects.create(label_id=2 * i, **owned),
+            models.ControllerLabel.objects.create(label_id=2 * i + 1, **owned),
+        )
+        models.Automation.objects.create(
+            automation_type="job_template",
+            automation_id=i,
+            primary=True,
+            pattern_instance=instance,
+            **owned,
+        )
+        Task.objects.create(status="Running", details={}, **owned)
+
+
+@pytest.mark.parametrize("count", [1, 100])
+@pytest.mark.parametrize(
+    "path, num_queries",
+    [
+        ("patterns/", 1),
+        ("patterns/?summary=true", 1),
+        ("controller_labels/", 1),
+        # One more query to prefetch the labels of all the instances
+        ("pattern_instances/", 2),
+        ("automations/", 1),
+        ("tasks/", 1),
+        ("tasks/?compact=true", 1),
+    ],
+)
+def test_list_num_queries(
+    client, db, django_assert_num_queries, path, num_queries, count
+):
+    create_resources(count)
+
+    with django_assert_num_queries(num_queries):
+        response = client.get(f"/api/pattern-service/v1/{path}")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) >= count
+
+
+def test_list_tasks_cursor_pagination(client, db, django_assert_num_queries):
+    tasks = [Task.objects.create(status="Running", details={}) for _ in range(3)]
+
+    # No COUNT(*), only the page and one extra row to know if there is a next one
+    with django_assert_num_queries(1):
+        response = client.get("/api/pattern-service/v1/tasks/?page_size=2")
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert [task["id"] for task in page["results"]] == [tasks[0].pk, tasks[1].pk]
+    assert page["previous"] is None
+
+    response = client.get(page["next"])
+    page = response.json()
+    assert [task["id"] for task in page["results"]] == [tasks[2].pk]
+    assert page["next"] is None
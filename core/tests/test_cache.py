@@ -0,0 +1,148 @@
+import hashlib
+import os
+from unittest.mock import patch
+
+import pytest
+
+from core.utils.cache import ArtifactCache
+from core.utils.cache import CacheStats
+from core.utils.cache import LRUCache
+from core.utils.cache import TTLCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(str(tmp_path), max_bytes=10)
+
+
+def test_cache_stats_hit_rate():
+    stats = CacheStats()
+    assert stats.hit_rate == 0.0
+
+    stats.record_hit()
+    stats.record_hit()
+    stats.record_miss()
+
+    assert stats.as_dict() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+        "hit_rate": 2 / 3,
+    }
+
+
+def test_artifact_cache_miss(cache):
+    assert cache.open_artifact("ns.col", "1.0.0") is None
+    assert cache.stats.misses == 1
+
+
+def test_artifact_cache_store_and_open(cache):
+    with cache.store("ns.col", "1.0.0", [b"abc", b"def"], url="https://hub/x"):
+        pass
+
+    entry = cache.get_entry("ns.col", "1.0.0")
+    digest = hashlib.sha256(b"abcdef").hexdigest()
+    assert entry == {"sha256": digest, "size": 6, "url": "https://hub/x"}
+    assert os.path.exists(cache.blob_path(digest))
+
+    with cache.open_artifact("ns.col", "1.0.0") as artifact:
+        assert artifact.read() == b"abcdef"
+    assert cache.stats.hits == 1
+
+
+def test_artifact_cache_deduplicates_identical_content(cache):
+    cache.store("ns.col", "1.0.0", [b"same"]).close()
+    cache.store("ns.other", "2.0.0", [b"same"]).close()
+
+    assert len(os.listdir(cache.blob_dir)) == 1
+
+
+@pytest.mark.parametrize(
+    "collection_name, version", [("../../../../x", "1.0.0"), ("ns.col", "1.0/0")]
+)
+def test_artifact_cache_keeps_files_inside_root(tmp_path, collection_name, version):
+    cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=10)
+
+    with cache.lock(collection_name, version):
+        cache.store(collection_name, version, [b"abc"]).close()
+
+    assert cache.get_entry(collection_name, version)["size"] == 3
+    assert os.listdir(tmp_path) == ["cache"]
+    assert len(os.listdir(cache.index_dir)) == 1
+    assert len(os.listdir(cache.lock_dir)) == 2  # the collection and the index
+
+
+def test_artifact_cache_evicts_least_recently_used(cache):
+    cache.store("ns.col", "1.0.0", [b"aaaa"]).close()
+    cache.store("ns.col", "2.0.0", [b"bbbb"]).close()
+
+    # Touch 1.0.0 so that 2.0.0 becomes the least recently used blob
+    first = cache.blob_path(cache.get_entry("ns.col", "1.0.0")["sha256"])
+    second = cache.blob_path(cache.get_entry("ns.col", "2.0.0")["sha256"])
+    os.utime(second, (0, 0))
+    cache.open_artifact("ns.col", "1.0.0").close()
+
+    cache.store("ns.col", "3.0.0", [b"cccc"]).close()
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert cache.get_entry("ns.col", "2.0.0") is None
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("roles", ttl=10)
+    with patch("core.utils.cache.time.monotonic", return_value=100):
+        cache.set("execute", "7")
+        assert cache.get("execute") == "7"
+
+    with patch("core.utils.cache.time.monotonic", return_value=110):
+        assert cache.get("execute") is None
+
+    assert cache.stats.as_dict()["hits"] == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_invalidate():
+    cache = TTLCache("roles", ttl=10)
+    cache.set("execute", "7")
+    cache.invalidate("execute")
+
+    assert cache.get("execute") is None
+
+
+def test_ttl_cache_shared_through_django_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    TTLCache("roles", ttl=10, backend="shared").set("execute", "7")
+
+    # Another process starts with an empty local cache
+    other = TTLCache("roles", ttl=10, backend="shared")
+    assert other.get("execute") == "7"
+    assert other.stats.hits == 1
+
+    other.invalidate("execute")
+    assert TTLCache("roles", ttl=10, backend="shared").get("execute") is None
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache("plans", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.as_dict() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "hit_rate": 0.75,
+    }
@@ -14,6 +14,52 @@ def test_get_http_session():
     assert s1 is not s2
 
 
+@pytest.fixture
+def shared_session():
+    cc.reset_shared_session()
+    yield
+    cc.reset_shared_session()
+
+
+def test_get_http_session_pool_settings(settings):
+    settings.AAP_HTTP_POOL_CONNECTIONS = 3
+    settings.AAP_HTTP_POOL_SIZE = 7
+    adapter = cc.get_http_session().get_adapter("https://aap.example.com")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+
+
+def test_get_shared_session_is_reused(shared_session):
+    assert cc.get_shared_session() is cc.get_shared_session()
+
+
+def test_get_shared_session_rebuilt_in_new_process(shared_session):
+    s1 = cc.get_shared_session()
+    with patch("core.utils.controller.client.os.getpid", return_value=-1):
+        s2 = cc.get_shared_session()
+    assert s1 is not s2
+
+
+def test_get_pool_stats(shared_session):
+    assert cc.get_pool_stats() == []
+
+    session = cc.get_shared_session()
+    session.get_adapter("https://aap.example.com").get_connection_with_tls_context(
+        requests.Request("GET", "https://aap.example.com/").prepare(),
+        verify=False,
+    )
+
+    assert cc.get_pool_stats() == [
+        {
+            "host": "https://aap.example.com:443",
+            "num_connections": 0,
+            "num_requests": 0,
+            "available": 10,
+            "max_size": 10,
+        }
+    ]
+
+
 def _fake_response(status_code: int, payload: dict | list) -> requests.Response:
     """Return a Response-like mock that behaves for raise_for_status/json."""
     resp = MagicMock(spec=requests.Response)
@@ -28,6 +74,36 @@ def _fake_response(status_code: int, payload: dict | list) -> requests.Response:
     return resp
 
 
+@patch("core.utils.controller.client.get_shared_session")
+def test_get_sends_conditional_headers(mock_get_shared_session):
+    session = MagicMock()
+    session.get.return_value = _fake_response(304, {})
+    mock_get_shared_session.return_value = session
+
+    response = cc.get(
+        "https://hub/artifact.tar.gz",
+        validators={"etag": '"abc"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+
+    assert response.status_code == 304
+    assert session.get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+
+
+def test_get_validators():
+    response = requests.Response()
+    response.headers["ETag"] = '"abc"'
+    assert cc.get_validators(response) == {"etag": '"abc"'}
+
+    response.headers["Last-Modified"] = "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert cc.get_validators(response) == {
+        "etag": '"abc"',
+        "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+
+
 @patch("core.utils.controller.client.get_http_session")
 def test_post_non_400_error_is_propagated(mock_get_http_session):
     """
@@ -1,21 +1,35 @@
+import copy
+import dataclasses
+import io
 import os
+import tarfile
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
 import requests
 
+from core.models import ControllerLabel
+from core.models import Pattern
+from core.models import PatternInstance
+from core.utils.cache import ArtifactCache
+from core.utils.cache import TTLCache
+from core.utils.controller import ProvisioningPlan
+from core.utils.controller import RoleAssignmentError
 from core.utils.controller import assign_execute_roles
 from core.utils.controller import build_collection_uri
 from core.utils.controller import create_execution_environment
 from core.utils.controller import create_job_templates
 from core.utils.controller import create_labels
 from core.utils.controller import create_project
-from core.utils.controller import download_collection
+from core.utils.controller import get_project_sync_statuses
+from core.utils.controller import get_provisioning_plan
+from core.utils.controller import open_collection_artifact
+from core.utils.controller import read_collection_files
 from core.utils.controller import save_instance_state
 from core.utils.controller.helpers import create_controller_role_assignment
 from core.utils.controller.helpers import get_role_definition_id
-from core.utils.controller.helpers import wait_for_project_sync
+from core.utils.pattern_schema import PatternValidationError
 
 
 @pytest.fixture
@@ -30,51 +44,56 @@ def mock_session():
     return MagicMock(spec=requests.Session)
 
 
-@pytest.fixture
-def mock_download_success(mock_tar_data):
-    """
-    Corrected fixture to mock a successful download scenario,
-    including mocking os.makedirs and ensuring cleanup.
-    """
-    with (
-        patch("core.utils.controller.helpers.get") as mock_get,
-        patch("core.utils.controller.helpers.tarfile.open") as mock_tar_open,
-        patch("core.utils.controller.helpers.os.makedirs") as mock_makedirs,
-        patch("core.utils.controller.helpers.shutil.rmtree") as mock_rmtree,
-        patch(
-            "core.utils.controller.helpers.tempfile.mkdtemp",
-            return_value="/mock/temp/dir",
-        ) as mock_mkdtemp,
+@pytest.fixture(autouse=True)
+def role_definition_cache():
+    """A fixture to provide an empty role definition cache to every test."""
+    cache = TTLCache("role_definitions", ttl=60)
+    with patch(
+        "core.utils.controller.helpers.get_role_definition_cache", return_value=cache
     ):
+        yield cache
 
-        mock_response = MagicMock()
-        mock_response.raw = mock_tar_data
-        mock_get.return_value = mock_response
 
-        mock_tar_open.return_value.__enter__.return_value = MagicMock()
+@pytest.fixture
+def label_cache():
+    """A fixture to provide an empty controller label cache."""
+    cache = TTLCache("controller_labels", ttl=60)
+    with patch("core.utils.controller.helpers.get_label_cache", return_value=cache):
+        yield cache
+
 
-        yield mock_get, mock_tar_open, mock_makedirs, mock_mkdtemp, mock_rmtree
+@pytest.fixture
+def artifact_cache(tmp_path):
+    """A fixture to provide an empty artifact cache in a temporary directory."""
+    cache = ArtifactCache(str(tmp_path / "artifacts"), max_bytes=1024 * 1024)
+    with patch("core.utils.controller.helpers.get_artifact_cache", return_value=cache):
+        yield cache
 
 
 @pytest.fixture
-def mock_download_failure():
-    """
-    Fixture to mock a download failure scenario by raising an exception
-    and mocking the cleanup functions.
-    """
-    with (
-        patch(
-            "core.utils.controller.helpers.get", side_effect=Exception("Network error")
-        ) as mock_get,
-        patch("core.utils.controller.helpers.shutil.rmtree") as mock_rmtree,
-        patch("core.utils.controller.helpers.os.makedirs"),
-        patch(
-            "core.utils.controller.helpers.tempfile.mkdtemp",
-            return_value="/mock/temp/dir",
-        ) as mock_mkdtemp,
-    ):
+def mock_get(mock_tar_data, artifact_cache):
+    """A fixture to mock automation hub serving a collection tarball."""
+    with patch("core.utils.controller.helpers.get") as mock_get:
+        mock_response = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+        mock_response.iter_content.return_value = [mock_tar_data]
+        mock_get.return_value = mock_response
+        yield mock_get
+
+
+def read_artifact(collection_name, version):
+    with open_collection_artifact(collection_name, version) as artifact:
+        return artifact.read()
 
-        yield mock_get, mock_rmtree, mock_mkdtemp
+
+def make_tarball(files):
+    """Builds an in-memory collection tarball from a mapping of path to bytes."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
 
 
 @pytest.mark.parametrize(
@@ -105,72 +124,368 @@ def test_build_collection_uri(collection_name, version, expected_uri):
     assert build_collection_uri(collection_name, version) == expected_uri
 
 
-def test_download_collection_success(mock_download_success):
+def test_open_collection_artifact_downloads_on_miss(
+    mock_get, mock_tar_data, artifact_cache
+):
     """
-    Tests the successful download and extraction of a collection.
+    Tests that a collection missing from the cache is downloaded and cached.
     """
-    mock_get, mock_tar_open, mock_makedirs, mock_mkdtemp, mock_rmtree = (
-        mock_download_success
+    assert read_artifact("my_namespace.my_collection", "1.0.0") == mock_tar_data
+
+    mock_get.assert_called_once_with(
+        build_collection_uri("my_namespace.my_collection", "1.0.0")
     )
+    entry = artifact_cache.get_entry("my_namespace.my_collection", "1.0.0")
+    assert entry["validators"] == {"etag": '"v1"'}
 
-    collection_name = "my_namespace.my_collection"
-    version = "1.0.0"
-    expected_path = os.path.join("/mock/temp/dir", "my_namespace.my_collection-1.0.0")
 
-    with download_collection(collection_name, version) as path:
-        # Assert that the correct path was yielded
-        assert path == expected_path
+def test_open_collection_artifact_uses_cached_artifact(
+    mock_get, mock_tar_data, artifact_cache, settings
+):
+    """
+    Tests that a collection version is only downloaded once.
+    """
+    settings.ARTIFACT_CACHE_REVALIDATE = False
 
-        mock_mkdtemp.assert_called_once()
-        mock_makedirs.assert_called_once_with(expected_path, exist_ok=True)
-        mock_get.assert_called_once()
-        mock_tar_open.assert_called_once()
+    for _ in range(3):
+        assert read_artifact("my_namespace.my_collection", "1.0.0") == mock_tar_data
 
-    mock_rmtree.assert_called_once_with("/mock/temp/dir")
+    mock_get.assert_called_once()
+    assert artifact_cache.stats.misses == 1
+    assert artifact_cache.stats.hits == 2
 
 
-def test_download_collection_failure(mock_download_failure):
+def test_open_collection_artifact_revalidates_cached_artifact(
+    mock_get, mock_tar_data, artifact_cache
+):
     """
-    Tests that an exception during download.
+    Tests that a cached collection is revalidated with a conditional GET.
     """
-    mock_get, mock_rmtree, mock_mkdtemp = mock_download_failure
+    read_artifact("my_namespace.my_collection", "1.0.0")
 
-    collection_name = "my_namespace.my_collection"
-    version = "1.0.0"
+    not_modified = MagicMock(status_code=304)
+    mock_get.return_value = not_modified
 
-    with pytest.raises(Exception, match="Network error"):
-        with download_collection(collection_name, version):
-            pass
+    assert read_artifact("my_namespace.my_collection", "1.0.0") == mock_tar_data
+    assert mock_get.call_args.kwargs == {"validators": {"etag": '"v1"'}}
+    not_modified.iter_content.assert_not_called()
 
-    mock_mkdtemp.assert_called_once()
-    mock_rmtree.assert_called_once_with("/mock/temp/dir")
+    changed = MagicMock(status_code=200, headers={"ETag": '"v2"'})
+    changed.iter_content.return_value = [b"new content"]
+    mock_get.return_value = changed
 
+    assert read_artifact("my_namespace.my_collection", "1.0.0") == b"new content"
+    entry = artifact_cache.get_entry("my_namespace.my_collection", "1.0.0")
+    assert entry["validators"] == {"etag": '"v2"'}
+    assert entry["size"] == len(b"new content")
 
-@patch("core.utils.controller.helpers.post")
-@patch("core.utils.controller.helpers.wait_for_project_sync")
-def test_create_project_builds_payload_and_waits(mock_wait, mock_post, mock_session):
-    instance = MagicMock(organization_id=7, credentials={"project": 123})
+
+@pytest.fixture
+def opened_artifacts(artifact_cache):
+    """A fixture to record the handles the artifact cache opens."""
+    opened = []
+
+    def open_artifact(*args):
+        opened.append(ArtifactCache.open_artifact(artifact_cache, *args))
+        return opened[-1]
+
+    with patch.object(artifact_cache, "open_artifact", side_effect=open_artifact):
+        yield opened
+
+
+def test_open_collection_artifact_revalidation_request_error(
+    mock_get, mock_tar_data, opened_artifacts, caplog
+):
+    """
+    Tests that the cached collection is used when automation hub can't be
+    reached to revalidate it.
+    """
+    read_artifact("my_namespace.my_collection", "1.0.0")
+
+    mock_get.side_effect = requests.ConnectionError("Hub is down")
+
+    assert read_artifact("my_namespace.my_collection", "1.0.0") == mock_tar_data
+    assert opened_artifacts[-1].closed
+    assert "Could not revalidate cached artifact" in caplog.text
+
+
+def test_open_collection_artifact_revalidation_failure(mock_get, opened_artifacts):
+    """
+    Tests that the cached collection is closed when revalidating it fails.
+    """
+    read_artifact("my_namespace.my_collection", "1.0.0")
+
+    mock_get.side_effect = ValueError("Unexpected")
+    with pytest.raises(ValueError, match="Unexpected"):
+        read_artifact("my_namespace.my_collection", "1.0.0")
+
+    assert opened_artifacts[-1].closed
+
+
+def test_open_collection_artifact_download_failure(artifact_cache):
+    """
+    Tests that a failed download is raised and leaves nothing in the cache.
+    """
+    with patch(
+        "core.utils.controller.helpers.get", side_effect=Exception("Network error")
+    ):
+        with pytest.raises(Exception, match="Network error"):
+            read_artifact("my_namespace.my_collection", "1.0.0")
+
+    assert artifact_cache.get_entry("my_namespace.my_collection", "1.0.0") is None
+
+
+@pytest.mark.parametrize("stream_on_miss", [True, False])
+def test_read_collection_files(artifact_cache, settings, stream_on_miss):
+    """
+    Tests that only the requested members are read from the tarball.
+    """
+    settings.ARTIFACT_STREAM_ON_MISS = stream_on_miss
+    tarball = make_tarball(
+        {
+            "MANIFEST.json": b"{}",
+            "extensions/patterns/p1/meta/pattern.json": b'{"name": "p1"}',
+            "roles/r1/tasks/main.yml": b"---",
+        }
+    )
+    response = MagicMock(status_code=200, headers={})
+    response.raw = io.BytesIO(tarball)
+    response.iter_content.return_value = [tarball]
+
+    with patch("core.utils.controller.helpers.get", return_value=response):
+        files = read_collection_files(
+            "ns.col",
+            "1.0.0",
+            ["extensions/patterns/p1/meta/pattern.json", "missing.json"],
+        )
+
+    assert files == {"extensions/patterns/p1/meta/pattern.json": b'{"name": "p1"}'}
+    response.close.assert_called_once()
+    # Streaming reads straight from the response and leaves the cache untouched
+    assert (artifact_cache.get_entry("ns.col", "1.0.0") is None) == stream_on_miss
+
+
+def test_read_collection_files_stops_after_last_member(artifact_cache, settings):
+    """
+    Tests that the response body is not read past the requested member.
+    """
+    settings.ARTIFACT_STREAM_ON_MISS = True
+    tarball = make_tarball(
+        {
+            "extensions/patterns/p1/meta/pattern.json": b"{}",
+            "roles/r1/files/blob.bin": os.urandom(512 * 1024),
+        }
+    )
+    response = MagicMock()
+    response.raw = io.BytesIO(tarball)
+
+    with patch("core.utils.controller.helpers.get", return_value=response):
+        files = read_collection_files(
+            "ns.col", "1.0.0", ["./extensions/patterns/p1/meta/pattern.json"]
+        )
+
+    assert list(files) == ["extensions/patterns/p1/meta/pattern.json"]
+    assert response.raw.tell() < len(tarball)
+
+
+def test_read_collection_files_fills_cache(artifact_cache):
+    """
+    Tests that with the default settings, the artifact read on a miss is
+    cached and the next read is served from the cache.
+    """
+    tarball = make_tarball({"meta/runtime.yml": b"requires_ansible: '>=2.15'"})
+    response = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+    response.iter_content.return_value = [tarball]
+    not_modified = MagicMock(status_code=304)
+
+    with patch(
+        "core.utils.controller.helpers.get", side_effect=[response, not_modified]
+    ) as mock_get:
+        for _ in range(2):
+            files = read_collection_files("ns.col", "1.0.0", ["meta/runtime.yml"])
+            assert files == {"meta/runtime.yml": b"requires_ansible: '>=2.15'"}
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs == {"validators": {"etag": '"v1"'}}
+    not_modified.iter_content.assert_not_called()
+    assert artifact_cache.get_entry("ns.col", "1.0.0") is not None
+    assert artifact_cache.stats.misses == 1
+    assert artifact_cache.stats.hits == 1
+
+
+def test_read_collection_files_wildcard(artifact_cache, settings):
+    """
+    Tests that wildcards match every pattern directory, one segment deep.
+    """
+    settings.ARTIFACT_CACHE_REVALIDATE = False
+    tarball = make_tarball(
+        {
+            "extensions/patterns/p1/meta/pattern.json": b"1",
+            "extensions/patterns/p2/meta/pattern.json": b"2",
+            "extensions/patterns/p3/nested/meta/pattern.json": b"3",
+            "extensions/patterns/p1/playbooks/site.yml": b"---",
+        }
+    )
+    artifact_cache.store("ns.col", "1.0.0", [tarball]).close()
+
+    files = read_collection_files(
+        "ns.col", "1.0.0", ["extensions/patterns/*/meta/pattern.json"]
+    )
+
+    assert files == {
+        "extensions/patterns/p1/meta/pattern.json": b"1",
+        "extensions/patterns/p2/meta/pattern.json": b"2",
+    }
+
+
+def test_read_collection_files_from_cache(artifact_cache, settings):
+    """
+    Tests that cached artifacts are read without contacting automation hub.
+    """
+    settings.ARTIFACT_CACHE_REVALIDATE = False
+    tarball = make_tarball({"meta/runtime.yml": b"requires_ansible: '>=2.15'"})
+    artifact_cache.store("ns.col", "1.0.0", [tarball]).close()
+
+    with patch("core.utils.controller.helpers.get") as mock_get:
+        files = read_collection_files("ns.col", "1.0.0", ["meta/runtime.yml"])
+
+    mock_get.assert_not_called()
+    assert files == {"meta/runtime.yml": b"requires_ansible: '>=2.15'"}
+
+
+def make_definition(**resources):
+    """Returns a valid pattern definition with the given resources."""
+    return {
+        "schema_version": "1.0",
+        "name": "mypat",
+        "title": "My pattern",
+        "description": "My pattern.",
+        "short_description": "My pattern",
+        "aap_resources": {
+            "controller_project": {
+                "name": "proj",
+                "description": "Project",
+                "scm_type": "git",
+            },
+            "controller_execution_environment": {
+                "name": "ee1",
+                "description": "EE",
+                "image_name": "ns/repo:tag",
+            },
+            "controller_labels": ["L1"],
+            "controller_job_templates": [
+                {"name": "jt1", "description": "JT", "playbook": "run.yml"}
+            ],
+            **resources,
+        },
+    }
+
+
+def make_plan(**resources):
+    """Builds the provisioning plan of a pattern with the given resources."""
     pattern = MagicMock(
         collection_version_uri="https://hub/artifacts/collection-1.0.0.tar.gz",
-        pattern_definition={
-            "aap_resources": {
-                "controller_project": {"name": "proj", "scm_type": "git"},
-            }
-        },
+        pattern_definition=make_definition(**resources),
     )
+    return ProvisioningPlan.from_pattern(pattern)
+
+
+@patch("core.utils.controller.helpers.settings.AAP_URL", "https://aap.example.com")
+def test_provisioning_plan_leaves_definition_untouched():
+    definition = {
+        "name": "mypat",
+        "aap_resources": {
+            "controller_project": {"name": "proj"},
+            "controller_execution_environment": {
+                "name": "ee1",
+                "image_name": "ns/repo:tag",
+            },
+            "controller_labels": ["L1", "L2", "L1"],
+            "controller_job_templates": [
+                {
+                    "name": "jt1",
+                    "playbook": "run.yml",
+                    "survey": {"spec": [{"variable": "x"}]},
+                    "primary": True,
+                }
+            ],
+        },
+    }
+    pattern = MagicMock(collection_version_uri="uri", pattern_definition=definition)
+    original = copy.deepcopy(definition)
+
+    plan = ProvisioningPlan.from_pattern(pattern)
+
+    assert definition == original
+    assert plan.labels == ("L1", "L2")
+    assert plan.execution_environment["image"] == "aap.example.com/ns/repo:tag"
+    assert "image_name" not in plan.execution_environment
+    jt = plan.job_templates[0]
+    assert jt.primary is True
+    assert jt.survey == {"spec": [{"variable": "x"}]}
+    assert "survey" not in jt.payload and "primary" not in jt.payload
+    with pytest.raises(TypeError):
+        jt.payload["name"] = "changed"  # type: ignore[index]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plan.labels = ()  # type: ignore[misc]
+
+
+@pytest.mark.django_db
+def test_get_provisioning_plan_is_cached_per_pattern_version(
+    pattern, provisioning_plan_cache, django_assert_num_queries
+):
+    pattern.set_definition(make_definition())
+    pattern.save()
+    # Patterns are loaded without their definition, as in the instance tasks
+    pattern = Pattern.objects.defer("pattern_definition").get(id=pattern.id)
+
+    with django_assert_num_queries(1):
+        plan = get_provisioning_plan(pattern)
+    with django_assert_num_queries(0):
+        assert get_provisioning_plan(pattern) is plan
+    assert plan.pattern_name == "mypat"
+
+    # A new version of the pattern gets a new plan
+    pattern.set_definition(make_definition(controller_labels=["L2"]))
+    pattern.save()
+    assert get_provisioning_plan(pattern).labels == ("L2",)
+    assert provisioning_plan_cache.stats.as_dict()["hits"] == 1
+    assert len(provisioning_plan_cache) == 2
+
+
+@pytest.mark.django_db
+def test_get_provisioning_plan_validates_definition(pattern):
+    pattern.pattern_definition = {"name": "mypat"}
+
+    with pytest.raises(PatternValidationError):
+        get_provisioning_plan(pattern)
+
+    pattern.pattern_definition = None
+    with pytest.raises(ValueError, match="Pattern definition is missing."):
+        get_provisioning_plan(pattern)
+
+
+@patch("core.utils.controller.helpers.post")
+def test_create_project_builds_payload(mock_post, mock_session):
+    instance = MagicMock(organization_id=7, credentials={"project": 123})
+    plan = make_plan()
 
     mock_post.return_value = {"id": 55}
 
-    pid = create_project(mock_session, instance, pattern)
+    pid = create_project(mock_session, instance, plan)
 
     assert pid == 55
     payload = mock_post.call_args.args[2]
-    print("payload", payload)
     assert payload["organization"] == 7
     assert payload["scm_type"] == "archive"
     assert payload["scm_url"] == "https://hub/artifacts/collection-1.0.0.tar.gz"
     assert payload["credential"] == 123
-    mock_wait.assert_called_once_with(mock_session, 55)
+    mock_session.get.assert_not_called()
+
+    # The plan is shared between instances and keeps no per-org field
+    create_project(mock_session, MagicMock(organization_id=8, credentials={}), plan)
+    assert mock_post.call_args.args[2]["organization"] == 8
+    assert "organization" not in plan.project
 
 
 @patch("core.utils.controller.helpers.post")
@@ -186,86 +501,122 @@ def test_create_execution_environment_pull(
     mock_post, ee_def, expected_pull, mock_session
 ):
     instance = MagicMock(organization_id=3, credentials={"ee": 777})
-    pattern_def = {"aap_resources": {"controller_execution_environment": dict(ee_def)}}
+    plan = make_plan(controller_execution_environment=ee_def)
     mock_post.return_value = {"id": 99}
-    _ = create_execution_environment(mock_session, instance, pattern_def)
+    _ = create_execution_environment(mock_session, instance, plan)
     payload = mock_post.call_args.args[2]
     assert payload["image"] == "aap.example.com/ns/repo:tag"
     assert payload["pull"] == expected_pull
+    assert payload["organization"] == 3
+    assert payload["credential"] == 777
 
+    # Creating it again, e.g. for another instance, still works
+    create_execution_environment(mock_session, instance, plan)
+    assert mock_post.call_args.args[2] == payload
 
-@patch("core.utils.controller.helpers.ControllerLabel")
+
+@pytest.mark.django_db
 @patch("core.utils.controller.helpers.post")
-def test_create_labels(mock_post, MockControllerLabel, mock_session):
+def test_create_labels(mock_post, mock_session, label_cache):
     instance = MagicMock(organization_id=1)
-    pattern_def = {"aap_resources": {"controller_labels": ["L1", "L2"]}}
+    plan = make_plan(controller_labels=["L1", "L2", "L3"])
 
-    mock_post.side_effect = [
-        {"id": 10},
-        {"id": 20},
-    ]
-    label1 = MagicMock()
-    label2 = MagicMock()
-    MockControllerLabel.objects.get_or_create.side_effect = [
-        (label1, True),
-        (label2, False),
-    ]
+    # L1 is already known in this organization; L2 has a local row already
+    label_cache.set("1:L1", 10)
+    ControllerLabel.objects.create(label_id=20)
+    mock_post.side_effect = lambda session, path, data: {
+        "id": {"L1": 10, "L2": 20, "L3": 30}[data["name"]]
+    }
+
+    labels = create_labels(mock_session, instance, plan)
 
-    labels = create_labels(mock_session, instance, pattern_def)
+    assert [label.label_id for label in labels] == [10, 20, 30]
+    assert ControllerLabel.objects.count() == 3
+    # Ensure proper payloads used, and only for the unknown labels
+    payloads = sorted(c.args[2]["name"] for c in mock_post.call_args_list)
+    assert payloads == ["L2", "L3"]
+    assert mock_post.call_args_list[0].args[2]["organization"] == 1
+    assert label_cache.get("1:L3") == 30
 
-    assert labels == [label1, label2]
-    # Ensure proper payloads used
-    first_payload = mock_post.call_args_list[0].args[2]
-    assert first_payload == {"name": "L1", "organization": 1}
+    # Another organization doesn't share the cached IDs
+    mock_post.reset_mock()
+    create_labels(mock_session, MagicMock(organization_id=2), plan)
+    assert mock_post.call_count == 3
 
 
 @patch("core.utils.controller.helpers.post")
 def test_create_job_templates_payload_and_survey(mock_post, mock_session):
     instance = MagicMock(organization_id=5)
-    pattern_def = {
-        "name": "mypat",
-        "aap_resources": {
-            "controller_job_templates": [
-                {
-                    "name": "jt1",
-                    "playbook": "run.yml",
-                    "survey": {"spec": 1},
-                    "primary": True,
-                },
-                {"name": "jt2", "playbook": "test.yml"},
-            ]
-        },
-    }
+    plan = make_plan(
+        controller_job_templates=[
+            {
+                "name": "jt1",
+                "playbook": "run.yml",
+                "survey": {"spec": 1},
+                "primary": True,
+            },
+            {"name": "jt2", "playbook": "test.yml"},
+        ]
+    )
 
-    # Calls happen in order: create jt1, survey jt1, create jt2
-    mock_post.side_effect = [
-        {"id": 11},  # create jt1
-        None,  # survey jt1 (return value ignored)
-        {"id": 22},  # create jt2
-    ]
+    # Job templates are created concurrently, so answer by payload
+    ids = {"jt1": 11, "jt2": 22}
 
-    autos = create_job_templates(
-        mock_session, instance, pattern_def, project_id=10, ee_id=20
-    )
+    def fake_post(session, path, payload):
+        if path.endswith("/survey_spec/"):
+            return None
+        return {"id": ids[payload["name"]]}
+
+    mock_post.side_effect = fake_post
+
+    autos = create_job_templates(mock_session, instance, plan, project_id=10, ee_id=20)
 
     assert autos == [
         {"type": "job_template", "id": 11, "primary": True},
         {"type": "job_template", "id": 22, "primary": False},
     ]
 
-    # Survey endpoint called once for jt1
-    survey_calls = [
-        args for args, _ in mock_post.call_args_list if "/survey_spec/" in args[1]
-    ]
-    assert len(survey_calls) == 1
+    # Survey endpoint called once for jt1, after jt1 was created
+    paths = [args[1] for args, _ in mock_post.call_args_list]
+    survey_path = "/api/controller/v2/job_templates/11/survey_spec/"
+    assert paths.count(survey_path) == 1
+    jt1_call = next(
+        i for i, c in enumerate(mock_post.call_args_list) if c.args[2]["name"] == "jt1"
+    )
+    assert paths.index(survey_path) > jt1_call
+    assert mock_post.call_args_list[paths.index(survey_path)].args[2] == {"spec": 1}
 
     # Verify payload fields for a JT
-    first_jt_payload = mock_post.call_args_list[0].args[2]
+    first_jt_payload = mock_post.call_args_list[jt1_call].args[2]
     assert first_jt_payload["organization"] == 5
     assert first_jt_payload["project"] == 10
     assert first_jt_payload["execution_environment"] == 20
     assert first_jt_payload["ask_inventory_on_launch"] is True
     assert first_jt_payload["playbook"] == "extensions/patterns/mypat/playbooks/run.yml"
+    assert "survey" not in first_jt_payload
+
+
+@patch("core.utils.controller.helpers.post")
+def test_create_job_templates_keeps_order_and_propagates_errors(
+    mock_post, mock_session, settings
+):
+    settings.INSTANCE_PROVISIONING_CONCURRENCY = 2
+    instance = MagicMock(organization_id=5)
+    plan = make_plan(
+        controller_job_templates=[
+            {"name": f"jt{i}", "playbook": "run.yml"} for i in range(5)
+        ]
+    )
+    mock_post.side_effect = lambda session, path, payload: {
+        "id": int(payload["name"][2:])
+    }
+
+    autos = create_job_templates(mock_session, instance, plan, 10, 20)
+    assert [auto["id"] for auto in autos] == [0, 1, 2, 3, 4]
+
+    mock_post.side_effect = requests.exceptions.HTTPError("boom")
+    with pytest.raises(requests.exceptions.HTTPError, match="boom"):
+        create_job_templates(mock_session, instance, plan, 10, 20)
 
 
 @patch("core.utils.controller.helpers.get_role_definition_id")
@@ -281,6 +632,65 @@ def test_assign_execute_roles(mock_post, mock_get_role_definition_id, mock_sessi
     assert mock_post.call_count == 6
 
 
+@patch("core.utils.controller.helpers.get_role_definition_id", return_value=7)
+@patch("core.utils.controller.helpers.post")
+def test_assign_execute_roles_collects_failures_per_assignee(
+    mock_post, mock_get_role_definition_id, mock_session
+):
+    def fake_post(session, path, data):
+        if data.get("team_ansible_id") == "200" and data["object_id"] == 2:
+            raise requests.exceptions.HTTPError("403 Forbidden")
+
+    mock_post.side_effect = fake_post
+    executors = {"teams": [100, 200], "users": [300]}
+
+    with pytest.raises(RoleAssignmentError) as exc_info:
+        assign_execute_roles(mock_session, executors, [{"id": 1}, {"id": 2}])
+
+    # The failure didn't stop the other assignments
+    assert mock_post.call_count == 6
+    assert exc_info.value.failures == {"team 200": ["job template 2: 403 Forbidden"]}
+    assert "team 200 (job template 2: 403 Forbidden)" in str(exc_info.value)
+
+
+@patch("core.utils.controller.helpers.get_role_definition_id", return_value="7")
+@patch("core.utils.controller.helpers.post")
+def test_assign_execute_roles_invalidates_role_on_404(
+    mock_post, mock_get_role_definition_id, mock_session, role_definition_cache
+):
+    role_definition_cache.set("JobTemplate Execute", "7")
+    mock_post.side_effect = requests.exceptions.HTTPError(
+        "404 Not Found", response=MagicMock(status_code=404)
+    )
+    mock_session.get.return_value = MagicMock(status_code=404)
+
+    with pytest.raises(RoleAssignmentError):
+        assign_execute_roles(mock_session, {"teams": [1]}, [{"id": 1}])
+
+    mock_session.get.assert_called_once_with(
+        "http://localhost:44926/api/controller/v2/role_definitions/7/"
+    )
+    assert role_definition_cache.get("JobTemplate Execute") is None
+
+
+@patch("core.utils.controller.helpers.get_role_definition_id", return_value="7")
+@patch("core.utils.controller.helpers.post")
+def test_assign_execute_roles_keeps_role_when_assignee_is_missing(
+    mock_post, mock_get_role_definition_id, mock_session, role_definition_cache
+):
+    role_definition_cache.set("JobTemplate Execute", "7")
+    mock_post.side_effect = requests.exceptions.HTTPError(
+        "404 Not Found", response=MagicMock(status_code=404)
+    )
+    # The role definition still exists: the team is what's missing
+    mock_session.get.return_value = MagicMock(status_code=200)
+
+    with pytest.raises(RoleAssignmentError):
+        assign_execute_roles(mock_session, {"teams": [1]}, [{"id": 1}])
+
+    assert role_definition_cache.get("JobTemplate Execute") == "7"
+
+
 @patch("core.utils.controller.helpers.get_role_definition_id")
 @patch("core.utils.controller.helpers.post")
 def test_assign_execute_roles_role_not_found_raises(
@@ -306,134 +716,122 @@ def test_assign_execute_roles_no_executors_early_return(
     mock_post.assert_not_called()
 
 
-def test_wait_for_project_sync_eventual_success(mock_session):
-    with (
-        patch("core.utils.controller.helpers.time.sleep", return_value=None),
-        patch("core.utils.controller.helpers.random.uniform", return_value=1.0),
-        patch(
-            "core.utils.controller.helpers.settings.AAP_URL", "https://aap.example.com"
-        ),
-    ):
-        # two polls: pending -> successful
-        resp_pending = MagicMock(
-            json=lambda: {"status": "pending"}, raise_for_status=lambda: None
-        )
-        resp_success = MagicMock(
-            json=lambda: {"status": "successful"}, raise_for_status=lambda: None
-        )
+def _projects_page(projects, next_url=None):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {"results": projects, "next": next_url}
+    return response
 
-        mock_session.get.side_effect = [resp_pending, resp_success]
 
-        wait_for_project_sync(
-            mock_session,
-            "42",
-            max_retries=5,
-            initial_delay=0.001,
-            max_delay=0.002,
-            timeout=0.001,
-        )
+def test_get_project_sync_statuses_uses_one_list_request(mock_session, settings):
+    settings.AAP_URL = "https://aap.example.com"
+    mock_session.get.return_value = _projects_page(
+        [{"id": 10, "status": "successful"}, {"id": 12, "status": "running"}]
+    )
 
-        assert mock_session.get.call_count == 2
+    statuses = get_project_sync_statuses(mock_session, [12, 10, 12])
 
+    assert statuses == {10: "successful", 12: "running"}
+    mock_session.get.assert_called_once_with(
+        "https://aap.example.com/api/controller/v2/projects/",
+        params={"id__in": "10,12", "page_size": 2},
+        timeout=30,
+    )
 
-def test_wait_for_project_sync_success_first_try(mock_session):
-    with (
-        patch(
-            "core.utils.controller.helpers.settings.AAP_URL", "https://aap.example.com"
-        ),
-    ):
-        resp_success = MagicMock()
-        resp_success.raise_for_status.return_value = None
-        resp_success.json.return_value = {"status": "successful"}
 
-        mock_session.get.return_value = resp_success
+def test_get_project_sync_statuses_batches_and_follows_pages(mock_session, settings):
+    settings.AAP_URL = "https://aap.example.com"
+    settings.PROJECT_SYNC_BATCH_SIZE = 2
+    next_url = "/api/controller/v2/projects/?id__in=1,2&page=2"
+    mock_session.get.side_effect = [
+        _projects_page([{"id": 1, "status": "pending"}], next_url),
+        _projects_page([{"id": 2, "status": "failed"}]),
+        _projects_page([{"id": 3, "status": "successful"}]),
+    ]
 
-        wait_for_project_sync(mock_session, "10")
-        mock_session.get.assert_called_once()
+    statuses = get_project_sync_statuses(mock_session, [1, 2, 3])
 
+    assert statuses == {1: "pending", 2: "failed", 3: "successful"}
+    calls = mock_session.get.call_args_list
+    assert calls[1].args == ("https://aap.example.com" + next_url,)
+    assert calls[1].kwargs["params"] is None
+    assert calls[2].kwargs["params"] == {"id__in": "3", "page_size": 1}
 
-def test_wait_for_project_sync_non_retryable_4xx_raises(mock_session):
-    with (
-        patch("core.utils.controller.helpers.time.sleep", return_value=None),
-        patch(
-            "core.utils.controller.helpers.settings.AAP_URL", "https://aap.example.com"
-        ),
-    ):
-        bad_response = MagicMock()
-        bad_response.status_code = 400
-
-        def raise_http():
-            err = requests.exceptions.HTTPError("bad")
-            err.response = bad_response
-            raise err
-
-        bad = MagicMock()
-        bad.raise_for_status.side_effect = raise_http
-        mock_session.get.return_value = bad
-
-        with pytest.raises(requests.exceptions.HTTPError):
-            wait_for_project_sync(
-                mock_session,
-                "99",
-                max_retries=2,
-                initial_delay=0,
-                max_delay=0,
-                timeout=0.001,
-            )
-
-
-def test_wait_for_project_sync_timeout_then_retry_then_fail(mock_session):
-    with (
-        patch("core.utils.controller.helpers.time.sleep", return_value=None),
-        patch("core.utils.controller.helpers.random.uniform", return_value=1.0),
-        patch(
-            "core.utils.controller.helpers.settings.AAP_URL", "https://aap.example.com"
-        ),
-    ):
-        # Two timeouts then give up after max_retries
-        mock_session.get.side_effect = [
-            requests.exceptions.Timeout("t1"),
-            requests.exceptions.Timeout("t2"),
-            requests.exceptions.Timeout("t3"),
-        ]
 
-        from core.utils.controller.helpers import RetryError
+def test_get_project_sync_statuses_no_projects(mock_session):
+    assert get_project_sync_statuses(mock_session, []) == {}
+    mock_session.get.assert_not_called()
 
-        with pytest.raises(RetryError):
-            wait_for_project_sync(
-                mock_session,
-                "77",
-                max_retries=3,
-                initial_delay=0.001,
-                max_delay=0.001,
-                timeout=0.001,
-            )
 
-        assert mock_session.get.call_count == 3
+def _http_error(status_code):
+    def raise_http():
+        err = requests.exceptions.HTTPError("bad")
+        err.response = MagicMock(status_code=status_code)
+        raise err
 
+    response = MagicMock()
+    response.raise_for_status.side_effect = raise_http
+    return response
 
-@patch("core.utils.controller.helpers.transaction.atomic")
-def test_save_instance_state_updates_and_links(mock_atomic):
-    mock_atomic.return_value.__enter__.return_value = None
-    mock_atomic.return_value.__exit__.return_value = None
-    instance = MagicMock()
-    labels = [MagicMock(), MagicMock()]
-    autos = [{"type": "job_template", "id": 1, "primary": True}]
 
-    save_instance_state(
-        instance, project_id=10, ee_id=20, labels=labels, automations=autos
-    )
+def test_get_project_sync_statuses_non_retryable_4xx_raises(mock_session):
+    mock_session.get.return_value = _http_error(400)
 
-    assert instance.controller_project_id == 10
-    assert instance.controller_ee_id == 20
-    instance.save.assert_called_once()
-    instance.controller_labels.add.assert_any_call(labels[0])
-    instance.controller_labels.add.assert_any_call(labels[1])
-    instance.automations.create.assert_called_once_with(
-        automation_type="job_template", automation_id=1, primary=True
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_project_sync_statuses(mock_session, [99])
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        _http_error(429),
+        _http_error(503),
+        requests.exceptions.Timeout("t1"),
+        requests.exceptions.ConnectionError("c1"),
+    ],
+)
+def test_get_project_sync_statuses_skips_transient_errors(mock_session, response):
+    mock_session.get.side_effect = [response]
+
+    assert get_project_sync_statuses(mock_session, [77]) == {}
+
+
+@pytest.fixture
+def pattern_instance(db):
+    pattern = Pattern.objects.create(
+        collection_name="mynamespace.mycollection",
+        collection_version="1.0.0",
+        pattern_name="example_pattern",
+    )
+    return PatternInstance.objects.create(
+        organization_id=1, credentials={}, executors={}, pattern=pattern
     )
 
 
+@pytest.mark.parametrize("count", [1, 10])
+def test_save_instance_state_updates_and_links(
+    pattern_instance, django_assert_num_queries, count
+):
+    labels = [ControllerLabel.objects.create(label_id=i) for i in range(count)]
+    autos = [{"type": "job_template", "id": i, "primary": i == 0} for i in range(count)]
+
+    # Savepoint and release, two system user lookups, the instance update,
+    # one M2M insert and one automation insert, whatever the count
+    with django_assert_num_queries(7):
+        save_instance_state(
+            pattern_instance, project_id=10, ee_id=20, labels=labels, automations=autos
+        )
+
+    pattern_instance.refresh_from_db()
+    assert pattern_instance.controller_project_id == 10
+    assert pattern_instance.controller_ee_id == 20
+    assert list(pattern_instance.controller_labels.all()) == labels
+    assert [
+        (auto.automation_type, auto.automation_id, auto.primary)
+        for auto in pattern_instance.automations.all()
+    ] == [("job_template", i, i == 0) for i in range(count)]
+
+
 def test_get_role_definition_id_found(mock_session):
     mock_response = MagicMock()
     mock_response.json.return_value = {"results": [{"id": "123"}]}
@@ -444,6 +842,10 @@ def test_get_role_definition_id_found(mock_session):
     assert role_id == "123"
     mock_session.get.assert_called_once()
 
+    # The second lookup is answered from the cache
+    assert get_role_definition_id(mock_session, "JobTemplate Execute") == "123"
+    mock_session.get.assert_called_once()
+
 
 def test_get_role_definition_id_not_found(mock_session):
     mock_response = MagicMock()
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from core.utils.dag import Step
+from core.utils.dag import run_steps
+
+
+def test_run_steps_passes_dependency_results():
+    result = run_steps(
+        [
+            Step("a", lambda: 1),
+            Step("b", lambda: 2),
+            Step("c", lambda a, b: a + b, depends_on=("a", "b")),
+        ],
+        max_workers=2,
+    )
+
+    assert result.results == {"a": 1, "b": 2, "c": 3}
+    assert set(result.durations) == {"a", "b", "c"}
+
+
+def test_run_steps_runs_independent_steps_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    result = run_steps(
+        [Step("a", lambda: barrier.wait()), Step("b", lambda: barrier.wait())],
+        max_workers=2,
+    )
+
+    assert set(result.results) == {"a", "b"}
+
+
+def test_run_steps_waits_for_dependencies():
+    order = []
+
+    def slow():
+        time.sleep(0.05)
+        order.append("slow")
+
+    run_steps(
+        [
+            Step("dependent", lambda slow: order.append("dependent"), ("slow",)),
+            Step("slow", slow),
+        ],
+        max_workers=2,
+    )
+
+    assert order == ["slow", "dependent"]
+
+
+def test_run_steps_propagates_errors_and_skips_dependents():
+    called = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_steps(
+            [
+                Step("fail", fail),
+                Step("after", lambda fail: called.append(fail), ("fail",)),
+            ],
+            max_workers=2,
+        )
+
+    assert called == []
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [Step("a", lambda b: b, ("b",))],
+        [Step("a", lambda b: b, ("b",)), Step("b", lambda a: a, ("a",))],
+    ],
+)
+def test_run_steps_rejects_invalid_graphs(steps):
+    with pytest.raises(ValueError):
+        run_steps(steps, max_workers=1)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from django.test import TestCase
@@ -94,6 +96,35 @@ class PatternModelTestCase(SharedDataMixin, TestCase):
             )
             pattern.full_clean()
 
+    def test_pattern_set_definition_copies_catalog_fields(self):
+        pattern = Pattern()
+        pattern.set_definition(
+            {
+                "schema_version": "1.0",
+                "title": "Create an AWS EC2 instance",
+                "short_description": "Provision a VM",
+                "tags": ["aws", "cloud"],
+            }
+        )
+        self.assertEqual(pattern.title, "Create an AWS EC2 instance")
+        self.assertEqual(pattern.short_description, "Provision a VM")
+        self.assertEqual(pattern.schema_version, "1.0")
+        self.assertEqual(pattern.tags, ["aws", "cloud"])
+
+        pattern.set_definition({"tags": "not-a-list"})
+        self.assertEqual(pattern.title, "")
+        self.assertEqual(pattern.tags, [])
+
+    def test_pattern_set_definition_truncates_catalog_fields(self):
+        definition = {"schema_version": "1." * 40, "title": "T" * 250}
+        self.pattern.set_definition(definition)
+        self.pattern.save()
+
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.schema_version, definition["schema_version"][:50])
+        self.assertEqual(self.pattern.title, "T" * 200)
+        self.assertEqual(self.pattern.pattern_definition, definition)
+
 
 class PatternControllerLabelModelTestCase(SharedDataMixin, TestCase):
     def test_controller_label_unique_constraint(self):
@@ -261,3 +292,14 @@ class PatternTaskModelTestCase(SharedDataMixin, TestCase):
         task = Task(status="Unknown", details={})
         with self.assertRaises(ValidationError):
             task.full_clean()  # triggers choice validation
+
+    def test_task_set_status_updates_modified(self):
+        task = Task.objects.create(status="Running", details={})
+        Task.objects.filter(id=task.id).update(
+            modified=task.created - timedelta(days=1)
+        )
+
+        task.mark_completed({"info": "Done"})
+
+        task.refresh_from_db()
+        self.assertGreaterEqual(task.modified, task.created)
@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core.models import Task
+from core.pagination import IdCursorPagination
+
+
+def test_cursor_pagination_is_opt_in(db):
+    Task.objects.create(status="Running", details={})
+    request = Request(RequestFactory().get("/"))
+
+    assert IdCursorPagination().paginate_queryset(Task.objects.all(), request) is None
+
+
+def test_benchmark_pagination_rolls_back(db):
+    out = StringIO()
+    call_command(
+        "benchmark_pagination", rows=50, page_size=5, page=10, repeat=1, stdout=out
+    )
+
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "Creating 50 tasks..."
+    assert [line.split()[0] for line in lines[2:]] == ["1", "10"]
+    assert Task.objects.count() == 0
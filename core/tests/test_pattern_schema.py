@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from core.utils.pattern_schema import PatternValidationError
+from core.utils.pattern_schema import get_pattern_validator
+from core.utils.pattern_schema import validate_pattern_definition
+
+
+@pytest.fixture
+def pattern_schema(tmp_path, settings):
+    path = tmp_path / "schema.json"
+    path.write_text(
+        json.dumps(
+            {
+                "$schema": "https://json-schema.org/draft/2020-12/schema",
+                "type": "object",
+                "required": ["name"],
+                "properties": {"name": {"type": "string"}},
+            }
+        )
+    )
+    settings.PATTERN_SCHEMA_PATH = path
+    get_pattern_validator.cache_clear()
+    yield path
+    get_pattern_validator.cache_clear()
+
+
+def test_validator_is_loaded_once(pattern_schema):
+    assert get_pattern_validator() is get_pattern_validator()
+
+    # Changes to the file are not picked up until the cache is cleared
+    pattern_schema.write_text("{}")
+    with pytest.raises(PatternValidationError):
+        validate_pattern_definition({})
+
+
+def test_validation_errors(pattern_schema):
+    validate_pattern_definition({"name": "mypattern"})
+
+    with pytest.raises(PatternValidationError) as exc_info:
+        validate_pattern_definition({"name": 1})
+    assert exc_info.value.errors == [
+        {"path": "$.name", "message": "1 is not of type 'string'"}
+    ]
+    assert str(exc_info.value) == (
+        "Invalid pattern definition: $.name: 1 is not of type 'string'"
+    )
+
+
+def test_pattern_schema_is_valid():
+    get_pattern_validator.cache_clear()
+    with pytest.raises(PatternValidationError):
+        validate_pattern_definition({"name": "mypattern"})
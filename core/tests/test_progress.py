@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.models import Task
+from core.utils.progress import TaskProgress
+
+
+@pytest.fixture
+def task(db):
+    return Task.objects.create(status="Initiated", details={})
+
+
+def test_task_progress_records_stages(task):
+    progress = TaskProgress(task, flush_interval=0)
+    with patch("core.utils.progress.time.time", side_effect=[10.0, 12.5, 13.0]):
+        progress.start_stage("Creating project")
+        progress.start_stage("Creating job templates", checkpoint={"id": 1})
+        progress.complete("Done", durations={"project": 2.5})
+
+    task.refresh_from_db()
+    assert task.status == "Completed"
+    assert task.details == {
+        "info": "Done",
+        "durations": {"project": 2.5},
+        "stages": [
+            {"name": "Creating project", "start": 10.0, "end": 12.5, "duration": 2.5},
+            {
+                "name": "Creating job templates",
+                "start": 12.5,
+                "end": 13.0,
+                "duration": 0.5,
+            },
+        ],
+    }
+
+
+def test_task_progress_coalesces_writes(task):
+    progress = TaskProgress(task, flush_interval=60)
+    with patch.object(Task, "set_status", autospec=True) as mock_set_status:
+        progress.start_stage("one")
+        progress.start_stage("two")
+        progress.start_stage("three")
+        assert mock_set_status.call_count == 1
+
+        progress.start_stage("four", flush=True)
+        progress.fail("boom")
+
+    assert mock_set_status.call_count == 3
+    _, status, details = mock_set_status.call_args.args
+    assert status == "Failed"
+    assert details["error"] == "boom"
+    assert [stage["name"] for stage in details["stages"]] == [
+        "one",
+        "two",
+        "three",
+        "four",
+    ]
+
+
+def test_task_progress_resumes_stage_history(task):
+    TaskProgress(task).start_stage("Waiting", checkpoint={"id": 1})
+
+    progress = TaskProgress(Task.objects.get(pk=task.pk))
+    assert progress.details == {"info": "Waiting", "checkpoint": {"id": 1}}
+    progress.start_stage("Resumed", flush=True)
+
+    task.refresh_from_db()
+    assert [stage["name"] for stage in task.details["stages"]] == [
+        "Waiting",
+        "Resumed",
+    ]
+    assert task.details["stages"][0]["end"] is not None
+    assert task.details["checkpoint"] == {"id": 1}
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Task
+from core.utils.retention import prune_tasks
+
+
+@pytest.fixture
+def old_tasks(db):
+    tasks = [
+        Task.objects.create(status=status, details={"n": n})
+        for n, status in enumerate(["Completed", "Failed", "Completed", "Running"])
+    ]
+    Task.objects.update(modified=timezone.now() - timedelta(days=40))
+    return tasks
+
+
+def test_prune_tasks_deletes_old_terminal_tasks_in_batches(old_tasks, tmp_path):
+    recent = Task.objects.create(status="Completed", details={})
+
+    result = prune_tasks(timedelta(days=30), batch_size=2, archive_dir=str(tmp_path))
+
+    assert result.deleted == 3
+    assert set(Task.objects.values_list("id", flat=True)) == {
+        old_tasks[3].id,
+        recent.id,
+    }
+    with gzip.open(result.archive_path, "rt") as archive:
+        archived = [json.loads(line) for line in archive]
+    assert [row["id"] for row in archived] == [task.id for task in old_tasks[:3]]
+    assert archived[1]["status"] == "Failed"
+    assert archived[1]["details"] == {"n": 1}
+
+
+def test_prune_tasks_keeps_recently_completed_tasks(db, tmp_path):
+    task = Task.objects.create(status="Running", details={})
+    Task.objects.update(
+        created=timezone.now() - timedelta(days=40),
+        modified=timezone.now() - timedelta(days=40),
+    )
+    task.refresh_from_db()
+    task.mark_completed({"info": "Done"})
+
+    result = prune_tasks(timedelta(days=30), batch_size=10, archive_dir=None)
+
+    assert result.deleted == 0
+    assert Task.objects.filter(id=task.id).exists()
+
+
+def test_prune_tasks_without_archive(old_tasks, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with CaptureQueriesContext(connection) as context:
+        result = prune_tasks(timedelta(days=30), batch_size=2, archive_dir=None)
+
+    assert result.deleted == 3
+    assert result.archive_path is None
+    assert list(Task.objects.values_list("id", flat=True)) == [old_tasks[3].id]
+    assert os.listdir(tmp_path) == []
+    selects = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+    ]
+    assert selects and all('"details"' not in sql for sql in selects)
+
+
+def test_prune_tasks_command(old_tasks, tmp_path):
+    out = StringIO()
+    call_command("prune_tasks", "--days=30", f"--archive-dir={tmp_path}", stdout=out)
+
+    assert out.getvalue().startswith("Deleted 3 tasks in ")
+    assert "Archived to" in out.getvalue()
+    assert Task.objects.count() == 1
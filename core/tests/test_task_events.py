@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+import json
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+
+from core.models import Task
+from core.utils.task_events import TASK_STATUS_CHANNEL
+from core.utils.task_events import TaskStatusChanges
+from core.utils.task_events import TaskStatusListener
+from core.utils.task_events import notify_task_status
+from core.utils.task_events import task_status_changes
+
+
+@pytest.fixture
+def running_task(db):
+    return Task.objects.create(status="Running", details={"info": "Working"})
+
+
+@pytest.fixture
+def completes_on_wait(running_task):
+    """Patches the subscription so that the task completes while it is waited on."""
+
+    class Changes:
+        async def wait(self, timeout):
+            await sync_to_async(running_task.mark_completed)({"info": "Done"})
+            return True
+
+    @contextlib.asynccontextmanager
+    async def fake_task_status_changes(task_id):
+        yield Changes()
+
+    with patch("core.views.task_status_changes", fake_task_status_changes):
+        yield
+
+
+def test_task_wait_returns_finished_task(client, task):
+    task.mark_completed({"info": "Done"})
+    response = client.get(f"/api/pattern-service/v1/tasks/{task.pk}/wait/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "Completed"
+
+
+def test_task_wait_times_out_with_current_state(client, running_task):
+    url = f"/api/pattern-service/v1/tasks/{running_task.pk}/wait/?timeout=0"
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "Running"
+
+
+def test_task_wait_wakes_up_on_change(client, running_task, completes_on_wait):
+    url = f"/api/pattern-service/v1/tasks/{running_task.pk}/wait/?timeout=10"
+    response = client.get(url)
+    assert response.json()["status"] == "Completed"
+    assert response.json()["details"] == {"info": "Done"}
+
+
+@pytest.mark.parametrize("timeout", ["soon", "nan", "inf", "-inf"])
+def test_task_wait_invalid_timeout(client, running_task, timeout):
+    url = f"/api/pattern-service/v1/tasks/{running_task.pk}/wait/?timeout={timeout}"
+    response = client.get(url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_task_wait_not_found(client, db):
+    response = client.get("/api/pattern-service/v1/tasks/999/wait/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_task_events_streams_transitions(client, running_task, completes_on_wait):
+    response = client.get(f"/api/pattern-service/v1/tasks/{running_task.pk}/events/")
+    assert response["Content-Type"] == "text/event-stream"
+
+    async def read_stream():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    events = async_to_sync(read_stream)().decode().strip().split("\n\n")
+    assert [event.splitlines()[0] for event in events] == [
+        "event: running",
+        "event: completed",
+    ]
+    last = json.loads(events[-1].splitlines()[1].removeprefix("data: "))
+    assert last["details"] == {"info": "Done"}
+
+
+def test_task_status_listener_dispatch():
+    async def scenario():
+        listener = TaskStatusListener("")
+        changes = TaskStatusChanges()
+        other = TaskStatusChanges()
+        listener._subscribers = {1: {changes}, 2: {other}}
+
+        listener.dispatch(json.dumps({"id": 1, "status": "Running"}))
+        listener.dispatch(json.dumps({"id": 1, "status": "Completed"}))
+        listener.dispatch("not json")
+
+        assert await changes.wait(0.1) is True
+        # Both notifications were coalesced into one wake-up
+        assert await changes.wait(0.01) is False
+        assert await other.wait(0.01) is False
+
+    asyncio.run(scenario())
+
+
+def test_notify_task_status_on_postgres():
+    with patch("core.utils.task_events.connection") as mock_connection:
+        mock_connection.vendor = "postgresql"
+        cursor = MagicMock()
+        mock_connection.cursor.return_value.__enter__.return_value = cursor
+
+        notify_task_status(5, "Completed")
+
+    cursor.execute.assert_called_once_with(
+        "SELECT pg_notify(%s, %s)",
+        [TASK_STATUS_CHANNEL, json.dumps({"id": 5, "status": "Completed"})],
+    )
+
+
+def test_task_status_changes_listens_on_default_database():
+    params = {
+        "dbname": "pattern_db",
+        "user": "pattern",
+        "host": "postgres",
+        "port": 5432,
+        "client_encoding": "UTF8",
+        "cursor_factory": object,
+        "prepare_threshold": None,
+    }
+
+    @contextlib.asynccontextmanager
+    async def subscribe(task_id):
+        yield TaskStatusChanges()
+
+    async def scenario():
+        with (
+            patch("core.utils.task_events.connection") as mock_connection,
+            patch("core.utils.task_events.TaskStatusListener") as mock_listener,
+        ):
+            mock_connection.vendor = "postgresql"
+            mock_connection.get_connection_params.return_value = params
+            mock_listener.return_value.subscribe = subscribe
+            async with task_status_changes(1):
+                pass
+            return mock_listener.call_args.args[0]
+
+    conninfo = asyncio.run(scenario())
+
+    # The same database that notify_task_status sends NOTIFY on
+    assert conninfo == (
+        "dbname=pattern_db user=pattern host=postgres port=5432 client_encoding=UTF8"
+    )
+
+
+def test_task_wait_views_are_documented():
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+
+    wait = schema["paths"]["/api/pattern-service/v1/tasks/{id}/wait/"]["get"]
+    assert [parameter["name"] for parameter in wait["parameters"]] == [
+        "id",
+        "timeout",
+    ]
+    assert wait["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/Task"
+    }
+    events = schema["paths"]["/api/pattern-service/v1/tasks/{id}/events/"]["get"]
+    assert "text/event-stream" in events["responses"]["200"]["content"]
@@ -1,10 +1,6 @@
 import json
-import os
-import shutil
-import tempfile
-from typing import List
+import time
 from unittest.mock import MagicMock
-from unittest.mock import call
 from unittest.mock import patch
 
 import requests
@@ -14,13 +10,42 @@ from core.models import ControllerLabel
 from core.models import Pattern
 from core.models import PatternInstance
 from core.models import Task
+from core.task_runner import resume_pattern_instance_task
+from core.task_runner import run_pattern_collection_task
 from core.task_runner import run_pattern_instance_task
 from core.task_runner import run_pattern_task
+from core.task_runner import watch_project_syncs
+from core.utils.controller import ProvisioningPlan
+from core.utils.controller import get_provisioning_plan
+from core.utils.progress import TaskProgress
+
+PATTERN_JSON_PATH = "extensions/patterns/example_pattern/meta/pattern.json"
+
+
+def make_definition(name, **fields):
+    """Returns a minimal pattern definition that matches the pattern schema."""
+    return {
+        "schema_version": "1.0",
+        "name": name,
+        "title": "Example pattern",
+        "description": "An example pattern.",
+        "short_description": "Example",
+        "aap_resources": {
+            "controller_project": {"name": "Project", "description": "Project"},
+            "controller_execution_environment": {
+                "name": "EE",
+                "description": "EE",
+                "image_name": "ns/ee:latest",
+            },
+            "controller_job_templates": [
+                {"name": "Run", "description": "Run it", "playbook": "run.yml"}
+            ],
+        },
+        **fields,
+    }
 
 
 class SharedDataMixin:
-    temp_dirs: List[str] = []
-
     @classmethod
     def setUpTestData(cls):
         cls.pattern = Pattern.objects.create(
@@ -28,12 +53,7 @@ class SharedDataMixin:
             collection_version="1.0.0",
             collection_version_uri="https://example.com/mynamespace/mycollection/",
             pattern_name="example_pattern",
-            pattern_definition={
-                "key": "value",
-                "execution_environment_id": 10,
-                "executors": ["exec1"],
-                "controller_labels": [5],
-            },
+            pattern_definition=make_definition("example_pattern"),
         )
 
         cls.pattern_instance = PatternInstance.objects.create(
@@ -50,42 +70,14 @@ class SharedDataMixin:
 
         cls.task = Task.objects.create(status="Running", details={"progress": "50%"})
 
-    def register_temp_dir(self, path: str):
-        self.temp_dirs.append(path)
-
-    def create_temp_collection_dir(self) -> str:
-        """
-        Creates and tracks a temp collection directory with pattern.json.
-        """
-        temp_dir = tempfile.mkdtemp()
-        self.register_temp_dir(temp_dir)
-
-        collection_path = os.path.join(temp_dir, "mynamespace-mycollection-1.0.0")
-        pattern_dir = os.path.join(
-            collection_path, "extensions", "patterns", "example_pattern", "meta"
-        )
-        os.makedirs(pattern_dir, exist_ok=True)
-
-        with open(os.path.join(pattern_dir, "pattern.json"), "w") as f:
-            json.dump({"mock_key": "mock_value"}, f)
-
-        return collection_path
-
-    def tearDown(self):
-        """
-        Automatically called after each test. Cleans up any temp dirs created.
-        """
-        for temp_dir in getattr(self, "temp_dirs", []):
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        self.temp_dirs.clear()
-
 
 class PatternTaskTest(SharedDataMixin, TestCase):
-    @patch("core.models.Task.set_status", autospec=True, wraps=Task.set_status)
-    @patch("core.task_runner.download_collection")
-    def test_run_pattern_task_success(self, mock_download, mock_update_status):
-        temp_dir_path = self.create_temp_collection_dir()
-        mock_download.return_value.__enter__.return_value = temp_dir_path
+    @patch.object(Task, "set_status", autospec=True, side_effect=Task.set_status)
+    @patch("core.task_runner.read_collection_files")
+    def test_run_pattern_task_success(self, mock_read_files, mock_update_status):
+        mock_read_files.return_value = {
+            PATTERN_JSON_PATH: json.dumps(make_definition("example_pattern")).encode()
+        }
 
         run_pattern_task(self.pattern.id, self.task.id)
 
@@ -110,13 +102,34 @@ class PatternTaskTest(SharedDataMixin, TestCase):
             self.task.details.get("info"), "Pattern processed successfully"
         )
 
+        mock_read_files.assert_called_once_with(
+            "mynamespace.mycollection", "1.0.0", [PATTERN_JSON_PATH]
+        )
+
         # Assert pattern definition was updated
         self.pattern.refresh_from_db()
-        self.assertEqual(self.pattern.pattern_definition, {"mock_key": "mock_value"})
+        self.assertEqual(
+            self.pattern.pattern_definition, make_definition("example_pattern")
+        )
+
+    @patch("core.task_runner.read_collection_files")
+    def test_run_pattern_task_reingest_changes_plan(self, mock_read_files):
+        definition = make_definition("example_pattern")
+        mock_read_files.return_value = {PATTERN_JSON_PATH: json.dumps(definition)}
+        run_pattern_task(self.pattern.id, self.task.id)
+        plan = get_provisioning_plan(Pattern.objects.get(id=self.pattern.id))
+
+        definition["aap_resources"]["controller_labels"] = ["L2"]
+        mock_read_files.return_value = {PATTERN_JSON_PATH: json.dumps(definition)}
+        run_pattern_task(self.pattern.id, self.task.id)
+        new_plan = get_provisioning_plan(Pattern.objects.get(id=self.pattern.id))
+
+        self.assertEqual(plan.labels, ())
+        self.assertEqual(new_plan.labels, ("L2",))
 
     @patch("core.models.Task.set_status", autospec=True)
-    @patch("core.task_runner.download_collection", side_effect=FileNotFoundError)
-    def test_run_pattern_task_file_not_found(self, mock_download, mock_update_status):
+    @patch("core.task_runner.read_collection_files", return_value={})
+    def test_run_pattern_task_file_not_found(self, mock_read_files, mock_update_status):
         pattern = Pattern.objects.create(
             collection_name="demo.collection",
             collection_version="1.0.0",
@@ -131,20 +144,141 @@ class PatternTaskTest(SharedDataMixin, TestCase):
         )
 
     @patch(
-        "core.task_runner.download_collection", side_effect=Exception("Download failed")
+        "core.task_runner.read_collection_files",
+        side_effect=Exception("Download failed"),
     )
-    def test_run_pattern_task_handles_download_failure(self, mock_download):
+    def test_run_pattern_task_handles_download_failure(self, mock_read_files):
         run_pattern_task(self.pattern.id, self.task.id)
         self.task.refresh_from_db()
         self.assertEqual(self.task.status, "Failed")
         self.assertIn("Download failed", self.task.details.get("error", ""))
 
+    @patch("core.task_runner.read_collection_files")
+    def test_run_pattern_task_invalid_definition(self, mock_read_files):
+        definition = make_definition("example_pattern", title=1)
+        del definition["aap_resources"]
+        mock_read_files.return_value = {PATTERN_JSON_PATH: json.dumps(definition)}
+
+        run_pattern_task(self.pattern.id, self.task.id)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details,
+            {
+                "error": "Pattern definition is invalid.",
+                "validation_errors": [
+                    {
+                        "path": "$",
+                        "message": "'aap_resources' is a required property",
+                    },
+                    {"path": "$.title", "message": "1 is not of type 'string'"},
+                ],
+            },
+        )
+        # The previous definition is kept
+        self.pattern.refresh_from_db()
+        self.assertEqual(
+            self.pattern.pattern_definition, make_definition("example_pattern")
+        )
+
+
+class PatternCollectionTaskTest(SharedDataMixin, TestCase):
+    @patch("core.task_runner.read_collection_files")
+    def test_run_pattern_collection_task_success(self, mock_read_files):
+        mock_read_files.return_value = {
+            PATTERN_JSON_PATH: json.dumps(
+                make_definition("example_pattern", title="Example", tags=["demo"])
+            ).encode(),
+            "extensions/patterns/other_pattern/meta/pattern.json": json.dumps(
+                make_definition("other_pattern")
+            ).encode(),
+        }
+
+        run_pattern_collection_task("mynamespace.mycollection", "1.0.0", self.task.id)
+
+        mock_read_files.assert_called_once_with(
+            "mynamespace.mycollection",
+            "1.0.0",
+            ["extensions/patterns/*/meta/pattern.json"],
+        )
+
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.pattern_definition["name"], "example_pattern")
+        self.assertEqual(self.pattern.title, "Example")
+        self.assertEqual(self.pattern.tags, ["demo"])
+
+        other = Pattern.objects.get(pattern_name="other_pattern")
+        self.assertEqual(other.collection_name, "mynamespace.mycollection")
+        self.assertEqual(other.collection_version, "1.0.0")
+        self.assertEqual(other.pattern_definition, make_definition("other_pattern"))
+        self.assertEqual(
+            other.collection_version_uri, self.pattern.collection_version_uri
+        )
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Completed")
+        self.assertEqual(
+            self.task.details["patterns"], sorted([self.pattern.id, other.id])
+        )
+
+    @patch("core.task_runner.read_collection_files", return_value={})
+    def test_run_pattern_collection_task_no_patterns(self, mock_read_files):
+        run_pattern_collection_task("demo.collection", "1.0.0", self.task.id)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(self.task.details, {"error": "Pattern definitions not found."})
+
+    @patch("core.task_runner.read_collection_files")
+    def test_run_pattern_collection_task_invalid_definition(self, mock_read_files):
+        mock_read_files.return_value = {
+            PATTERN_JSON_PATH: json.dumps(make_definition("example_pattern")),
+            "extensions/patterns/other_pattern/meta/pattern.json": json.dumps(
+                make_definition("Other pattern")
+            ),
+            "extensions/patterns/third_pattern/meta/pattern.json": json.dumps(
+                make_definition("example_pattern")
+            ),
+        }
+
+        run_pattern_collection_task("mynamespace.mycollection", "1.0.0", self.task.id)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details["validation_errors"],
+            {
+                "other_pattern": [
+                    {
+                        "path": "$.name",
+                        "message": "'Other pattern' does not match '^[a-z0-9_]+$'",
+                    },
+                    {
+                        "path": "$.name",
+                        "message": (
+                            "'Other pattern' does not match the pattern "
+                            "directory 'other_pattern'"
+                        ),
+                    },
+                ],
+                # A copied definition that wasn't renamed
+                "third_pattern": [
+                    {
+                        "path": "$.name",
+                        "message": (
+                            "'example_pattern' does not match the pattern "
+                            "directory 'third_pattern'"
+                        ),
+                    }
+                ],
+            },
+        )
+        self.assertFalse(Pattern.objects.filter(pattern_name="other_pattern").exists())
+
 
 class PatternInstanceTaskTest(SharedDataMixin, TestCase):
-    @patch("core.task_runner.get_http_session")
-    @patch("core.task_runner.assign_execute_roles")
-    @patch("core.task_runner.save_instance_state")
-    @patch("core.task_runner.create_job_templates")
+    @patch("core.task_runner.get_shared_session")
     @patch("core.task_runner.create_labels")
     @patch("core.task_runner.create_execution_environment")
     @patch("core.task_runner.create_project")
@@ -155,9 +289,6 @@ class PatternInstanceTaskTest(SharedDataMixin, TestCase):
         mock_create_project,
         mock_create_ee,
         mock_create_labels,
-        mock_create_jts,
-        mock_save_instance,
-        mock_assign_roles,
         mock_get_session,
     ):
         mock_session_instance = MagicMock(spec=requests.Session)
@@ -165,38 +296,32 @@ class PatternInstanceTaskTest(SharedDataMixin, TestCase):
 
         mock_create_project.side_effect = [321]
         mock_create_ee.side_effect = [654]
-        mock_create_labels.side_effect = [[]]
-        mock_create_jts.side_effect = [[]]
+        mock_create_labels.side_effect = [[self.label]]
 
         run_pattern_instance_task(
             instance_id=self.pattern_instance.id,
             task_id=self.task.id,
         )
 
+        plan = ProvisioningPlan.from_pattern(self.pattern)
         mock_create_project.assert_called_once_with(
-            mock_session_instance, self.pattern_instance, self.pattern
+            mock_session_instance, self.pattern_instance, plan
         )
-        mock_assign_roles.assert_called_once()
-
-        # Ensure task marked Completed
-        mock_update_status.assert_has_calls(
-            [
-                call(self.task, "Running", {"info": "Creating controller project"}),
-                call(self.task, "Running", {"info": "Creating execution environment"}),
-                call(self.task, "Running", {"info": "Creating labels"}),
-                call(self.task, "Running", {"info": "Creating job templates"}),
-                call(self.task, "Running", {"info": "Saving instance"}),
-                call(self.task, "Running", {"info": "Assigning roles"}),
-                call(self.task, "Completed", {"info": "PatternInstance processed"}),
-            ]
-        )
-        # Assert all key functions were called exactly once
-        mock_create_project.assert_called_once()
         mock_create_ee.assert_called_once()
         mock_create_labels.assert_called_once()
-        mock_create_jts.assert_called_once()
-        mock_save_instance.assert_called_once()
-        mock_assign_roles.assert_called_once()
+
+        # The worker is released while the project syncs
+        waiting = mock_update_status.call_args_list[-1].args
+        self.assertEqual(waiting[1], "Running")
+        self.assertEqual(waiting[2]["info"], "Waiting for project sync")
+        checkpoint = waiting[2]["checkpoint"]
+        self.assertEqual(checkpoint["instance_id"], self.pattern_instance.id)
+        self.assertEqual(checkpoint["project_id"], 321)
+        self.assertEqual(checkpoint["ee_id"], 654)
+        self.assertEqual(checkpoint["label_ids"], [self.label.id])
+        self.assertEqual(
+            set(checkpoint["durations"]), {"project", "execution_environment", "labels"}
+        )
 
     @patch("core.task_runner.assign_execute_roles")
     @patch("core.task_runner.save_instance_state")
@@ -221,10 +346,234 @@ class PatternInstanceTaskTest(SharedDataMixin, TestCase):
         )
 
         # Verify that the task was marked Failed with the right message
-        mock_update_status.assert_any_call(
-            self.task,
-            "Failed",
-            {"error": "error"},
-        )
+        _, status, details = mock_update_status.call_args.args
+        self.assertEqual(status, "Failed")
+        self.assertEqual(details["error"], "error")
+        self.assertEqual(details["stages"][-1]["name"], "Creating controller resources")
 
         mock_create_project.assert_called_once()
+
+    @patch("core.task_runner.get_shared_session")
+    def test_invalid_definition_fails_before_aap_calls(self, mock_get_session):
+        Pattern.objects.filter(id=self.pattern.id).update(
+            pattern_definition={"name": "example_pattern"}
+        )
+
+        run_pattern_instance_task(self.pattern_instance.id, self.task.id)
+
+        mock_get_session.assert_not_called()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertIn("Invalid pattern definition", self.task.details["error"])
+        self.assertEqual(
+            [error["path"] for error in self.task.details["validation_errors"]],
+            ["$", "$", "$", "$", "$"],
+        )
+
+
+class ProjectSyncWatcherTest(SharedDataMixin, TestCase):
+    def setUp(self):
+        self.checkpoint = {
+            "instance_id": self.pattern_instance.id,
+            "project_id": 321,
+            "ee_id": 654,
+            "label_ids": [self.label.id],
+            "durations": {"project": 0.1},
+            "sync_started": time.time(),
+        }
+        TaskProgress(self.task).start_stage(
+            "Waiting for project sync", checkpoint=self.checkpoint
+        )
+
+        patcher = patch("core.task_runner.get_shared_session")
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def _waiting_task(self, project_id):
+        return Task.objects.create(
+            status="Running",
+            details={
+                "info": "Waiting for project sync",
+                "checkpoint": {**self.checkpoint, "project_id": project_id},
+            },
+        )
+
+    @patch("core.tasks.submit_task")
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_checks_all_waiting_projects_at_once(self, mock_statuses, mock_submit):
+        other = self._waiting_task(322)
+        Task.objects.create(status="Running", details={"info": "Processing pattern"})
+        mock_statuses.return_value = {321: "running", 322: "pending"}
+
+        watch_project_syncs()
+
+        mock_statuses.assert_called_once_with(self.session, [321, 322])
+        mock_submit.assert_not_called()
+        for task in (self.task, other):
+            task.refresh_from_db()
+            self.assertEqual(task.details["info"], "Waiting for project sync")
+
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_nothing_waiting(self, mock_statuses):
+        self.task.mark_completed({"info": "PatternInstance processed"})
+
+        watch_project_syncs()
+
+        mock_statuses.assert_not_called()
+
+    @patch("core.tasks.submit_task")
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_resumes_synced_projects(self, mock_statuses, mock_submit):
+        mock_statuses.return_value = {321: "successful"}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            watch_project_syncs()
+
+        mock_submit.assert_called_once_with(
+            resume_pattern_instance_task,
+            queue="pattern-service-tasks",
+            args=(self.pattern_instance.id, self.task.id),
+        )
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Running")
+        self.assertEqual(self.task.details["info"], "Project synced")
+        self.assertEqual(self.task.details["checkpoint"], self.checkpoint)
+
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_fails_when_sync_fails(self, mock_statuses):
+        mock_statuses.return_value = {321: "failed"}
+
+        watch_project_syncs()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details["error"],
+            "Project 321 sync failed with status: 'failed'.",
+        )
+
+    @patch("core.task_runner.get_project_sync_statuses", return_value={})
+    def test_fails_after_timeout(self, mock_statuses):
+        self.checkpoint["sync_started"] = time.time() - 60
+        self.task.mark_running(
+            {"info": "Waiting for project sync", "checkpoint": self.checkpoint}
+        )
+
+        with self.settings(PROJECT_SYNC_TIMEOUT=30):
+            watch_project_syncs()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details["error"], "Project 321 failed to sync within 30 seconds."
+        )
+
+    @patch("core.tasks.submit_task")
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_updates_only_tasks_still_waiting(self, mock_statuses, mock_submit):
+        def complete_task(session, project_ids):
+            # The task changes while the controller is being queried
+            Task.objects.filter(id=self.task.id).update(
+                details={"info": "Creating job templates"}
+            )
+            return {321: "successful"}
+
+        mock_statuses.side_effect = complete_task
+
+        with self.captureOnCommitCallbacks(execute=True):
+            watch_project_syncs()
+
+        mock_submit.assert_not_called()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.details, {"info": "Creating job templates"})
+
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_fails_when_not_resumed_in_time(self, mock_statuses):
+        TaskProgress(self.task).start_stage("Project synced", flush=True)
+
+        with self.settings(PROJECT_SYNC_TIMEOUT=0):
+            watch_project_syncs()
+
+        mock_statuses.assert_not_called()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details["error"],
+            "Task was not resumed within 0 seconds of the project sync.",
+        )
+
+        # A late resume leaves the failed task alone
+        with patch("core.task_runner.create_job_templates") as mock_create_jts:
+            resume_pattern_instance_task(self.pattern_instance.id, self.task.id)
+        mock_create_jts.assert_not_called()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_keeps_task_being_resumed(self, mock_statuses):
+        TaskProgress(self.task).start_stage("Project synced", flush=True)
+
+        watch_project_syncs()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Running")
+        self.assertEqual(self.task.details["info"], "Project synced")
+
+    @patch("core.task_runner.get_project_sync_statuses")
+    def test_fails_after_timeout_when_controller_errors(self, mock_statuses):
+        response = requests.Response()
+        response.status_code = 403
+        mock_statuses.side_effect = requests.HTTPError(response=response)
+        self.checkpoint["sync_started"] = time.time() - 60
+        self.task.mark_running(
+            {"info": "Waiting for project sync", "checkpoint": self.checkpoint}
+        )
+
+        with self.settings(PROJECT_SYNC_TIMEOUT=30):
+            watch_project_syncs()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Failed")
+        self.assertEqual(
+            self.task.details["error"], "Project 321 failed to sync within 30 seconds."
+        )
+
+    @patch("core.task_runner.assign_execute_roles")
+    @patch("core.task_runner.save_instance_state")
+    @patch("core.task_runner.create_job_templates")
+    def test_resume_from_checkpoint(
+        self, mock_create_jts, mock_save_instance, mock_assign_roles
+    ):
+        automations = [{"type": "job_template", "id": 1, "primary": True}]
+        mock_create_jts.return_value = automations
+        TaskProgress(self.task).start_stage("Project synced", flush=True)
+
+        resume_pattern_instance_task(self.pattern_instance.id, self.task.id)
+
+        mock_create_jts.assert_called_once_with(
+            self.session,
+            self.pattern_instance,
+            ProvisioningPlan.from_pattern(self.pattern),
+            321,
+            654,
+        )
+        mock_save_instance.assert_called_once_with(
+            self.pattern_instance, 321, 654, [self.label], automations
+        )
+        mock_assign_roles.assert_called_once_with(
+            self.session, self.pattern_instance.executors, automations
+        )
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "Completed")
+        self.assertEqual(self.task.details["durations"], {"project": 0.1})
+        self.assertEqual(
+            [stage["name"] for stage in self.task.details["stages"]],
+            [
+                "Waiting for project sync",
+                "Project synced",
+                "Creating job templates",
+                "Saving instance",
+                "Assigning roles",
+            ],
+        )
+        self.assertTrue(all(stage["end"] for stage in self.task.details["stages"]))
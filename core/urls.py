@@ -1,10 +1,13 @@
 from ansible_base.lib.routers import AssociationResourceRouter
+from django.urls import path
 
 from .views import AutomationViewSet
 from .views import ControllerLabelViewSet
 from .views import PatternInstanceViewSet
 from .views import PatternViewSet
 from .views import TaskViewSet
+from .views import task_events
+from .views import task_wait
 
 router = AssociationResourceRouter()
 router.register(r"patterns", PatternViewSet, basename="pattern")
@@ -17,4 +20,8 @@ router.register(
 router.register(r"automations", AutomationViewSet, basename="automation")
 router.register(r"tasks", TaskViewSet, basename="task")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("tasks/<int:pk>/wait/", task_wait, name="task-wait"),
+    path("tasks/<int:pk>/events/", task_events, name="task-events"),
+    *router.urls,
+]
@@ -0,0 +1,374 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from typing import Any
+from typing import BinaryIO
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def record_eviction(self, count: int = 1) -> None:
+        with self._lock:
+            self.evictions += count
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class TTLCache:
+    """
+    Thread-safe, per-process cache whose entries expire ``ttl`` seconds after
+    they were set.
+
+    If ``backend`` names one of the Django ``CACHES``, entries are written
+    there as well, and a local miss is looked up in it before it counts as a
+    miss. This lets the worker processes share their lookups.
+
+    Args:
+        name: Prefix of the keys in the Django cache, also used in logs.
+        ttl: Lifetime of an entry in seconds.
+        backend: Optional alias of a Django cache backing this cache.
+    """
+
+    def __init__(self, name: str, ttl: float, backend: Optional[str] = None) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self.stats = CacheStats()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.stats.record_eviction()
+                entry = None
+        if entry is not None:
+            self.stats.record_hit()
+            return entry[1]
+
+        if self.backend:
+            value = caches[self.backend].get(self._shared_key(key))
+            if value is not None:
+                self._set_local(key, value)
+                self.stats.record_hit()
+                return value
+
+        self.stats.record_miss()
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self._set_local(key, value)
+        if self.backend:
+            caches[self.backend].set(self._shared_key(key), value, timeout=self.ttl)
+
+    def _set_local(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: str) -> None:
+        """Drops an entry, e.g. once the cached value turned out to be stale."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend:
+            caches[self.backend].delete(self._shared_key(key))
+        logger.info(f"Invalidated {self.name} cache entry '{key}'")
+
+
+class LRUCache:
+    """
+    Thread-safe, per-process cache holding at most ``maxsize`` entries; the
+    least recently used entry is evicted to make room for a new one.
+
+    Args:
+        name: Name of the cache, used in logs.
+        maxsize: Maximum number of entries.
+    """
+
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None if it is missing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                value = self._entries[key]
+            else:
+                value = None
+        if value is None:
+            self.stats.record_miss()
+        else:
+            self.stats.record_hit()
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.record_eviction(evicted)
+            logger.debug(f"Evicted {evicted} {self.name} cache entries")
+
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache for collection artifacts.
+
+    Artifacts are stored once under ``blobs/<sha256>.tar.gz`` and looked up
+    through a small JSON index entry per collection name and version. Blob
+    modification times track recency of use, so the least recently used blobs
+    are evicted first once the total size exceeds ``max_bytes``. All mutations
+    are guarded by ``fcntl`` file locks, which makes the cache safe to share
+    between dispatcherd worker processes on the same node.
+
+    Args:
+        root: Directory holding the cache.
+        max_bytes: Upper bound on the total size of cached blobs.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = os.fspath(root)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.index_dir = os.path.join(self.root, "index")
+        self.lock_dir = os.path.join(self.root, "locks")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        for path in (self.blob_dir, self.index_dir, self.lock_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def _key(collection_name: str, version: str) -> str:
+        # Names and versions come from API clients: hashing them keeps the
+        # index and lock files inside the cache whatever they contain
+        return hashlib.sha256(f"{collection_name}\0{version}".encode()).hexdigest()
+
+    def _index_path(self, collection_name: str, version: str) -> str:
+        return os.path.join(
+            self.index_dir, f"{self._key(collection_name, version)}.json"
+        )
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, f"{digest}.tar.gz")
+
+    @contextlib.contextmanager
+    def _flock(self, name: str, mode: int) -> Iterator[None]:
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def lock(self, collection_name: str, version: str) -> Iterator[None]:
+        """
+        Holds an exclusive, cross-process lock for one collection version.
+
+        Callers wrap the lookup/download/store sequence in this lock so that
+        concurrent workers wait for a single download instead of repeating it.
+        """
+        with self._flock(self._key(collection_name, version), fcntl.LOCK_EX):
+            yield
+
+    def get_entry(self, collection_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """Returns the index entry for a collection version, if one exists."""
+        try:
+            with open(self._index_path(collection_name, version)) as index_file:
+                entry: Dict[str, Any] = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not os.path.exists(self.blob_path(entry["sha256"])):
+            return None
+        return entry
+
+    def open_artifact(self, collection_name: str, version: str) -> Optional[BinaryIO]:
+        """
+        Opens the cached artifact for reading, or returns None on a miss.
+
+        The blob is opened while the index lock is held, so a concurrent
+        eviction cannot remove it from under the caller. A hit refreshes the
+        blob's modification time so it is treated as recently used.
+        """
+        with self._flock("index", fcntl.LOCK_SH):
+            entry = self.get_entry(collection_name, version)
+            if entry is None:
+                self.stats.record_miss()
+                return None
+            path = self.blob_path(entry["sha256"])
+            os.utime(path)
+            blob = open(path, "rb")
+        self.stats.record_hit()
+        return blob
+
+    def store(
+        self,
+        collection_name: str,
+        version: str,
+        chunks: Iterable[bytes],
+        **metadata: Any,
+    ) -> BinaryIO:
+        """
+        Writes an artifact to the cache and opens the stored blob for reading.
+
+        Args:
+            collection_name: The collection name.
+            version: The collection version.
+            chunks: The artifact content.
+            metadata: Extra values to record in the index entry.
+
+        Returns:
+            The stored blob, opened for reading.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp_file.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+            entry = {"sha256": sha256, "size": size, **metadata}
+
+            with self._flock("index", fcntl.LOCK_EX):
+                os.replace(tmp_path, path)
+                self._write_index(collection_name, version, entry)
+                self._evict(keep=path)
+                blob = open(path, "rb")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logger.info(f"Cached {collection_name}-{version} as {sha256} ({size} bytes)")
+        return blob
+
+    def _write_index(
+        self, collection_name: str, version: str, entry: Dict[str, Any]
+    ) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(entry, tmp_file)
+        os.replace(tmp_path, self._index_path(collection_name, version))
+
+    def _evict(self, keep: str) -> None:
+        """Removes least recently used blobs until the cache fits max_bytes."""
+        blobs = []
+        for name in os.listdir(self.blob_dir):
+            path = os.path.join(self.blob_dir, name)
+            stat = os.stat(path)
+            blobs.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in blobs)
+        evicted = 0
+        for _, size, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+            evicted += 1
+            logger.debug(f"Evicted cached artifact {path}")
+
+        if evicted:
+            self.stats.record_eviction(evicted)
+
+
+@lru_cache(maxsize=None)
+def get_role_definition_cache() -> TTLCache:
+    """Returns the process-wide role definition cache configured in settings."""
+    return TTLCache(
+        "role_definitions",
+        settings.ROLE_DEFINITION_CACHE_TTL,
+        settings.ROLE_DEFINITION_CACHE_BACKEND,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_label_cache() -> TTLCache:
+    """Returns the process-wide controller label ID cache configured in settings."""
+    return TTLCache(
+        "controller_labels", settings.LABEL_CACHE_TTL, settings.LABEL_CACHE_BACKEND
+    )
+
+
+@lru_cache(maxsize=None)
+def get_provisioning_plan_cache() -> LRUCache:
+    """Returns the process-wide provisioning plan cache configured in settings."""
+    return LRUCache("provisioning_plans", settings.PROVISIONING_PLAN_CACHE_SIZE)
+
+
+@lru_cache(maxsize=None)
+def get_artifact_cache() -> ArtifactCache:
+    """Returns the process-wide artifact cache configured in settings."""
+    return ArtifactCache(settings.ARTIFACT_CACHE_DIR, settings.ARTIFACT_CACHE_MAX_BYTES)
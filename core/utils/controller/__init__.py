@@ -1,21 +1,39 @@
 from .client import get_http_session
+from .client import get_pool_stats
+from .client import get_shared_session
+from .helpers import RoleAssignmentError
 from .helpers import assign_execute_roles
 from .helpers import build_collection_uri
 from .helpers import create_execution_environment
 from .helpers import create_job_templates
 from .helpers import create_labels
 from .helpers import create_project
-from .helpers import download_collection
+from .helpers import get_project_sync_statuses
+from .helpers import open_collection_artifact
+from .helpers import read_collection_files
+from .helpers import save_collection_patterns
 from .helpers import save_instance_state
+from .plan import JobTemplatePlan
+from .plan import ProvisioningPlan
+from .plan import get_provisioning_plan
 
 __all__ = [
+    "JobTemplatePlan",
+    "ProvisioningPlan",
+    "RoleAssignmentError",
     "assign_execute_roles",
     "build_collection_uri",
     "create_execution_environment",
     "create_job_templates",
     "create_labels",
     "create_project",
-    "download_collection",
+    "get_project_sync_statuses",
+    "get_provisioning_plan",
+    "open_collection_artifact",
+    "read_collection_files",
+    "save_collection_patterns",
     "save_instance_state",
     "get_http_session",
+    "get_pool_stats",
+    "get_shared_session",
 ]
@@ -1,12 +1,16 @@
 import logging
+import os
+import threading
 import urllib.parse
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 
 import requests
 from django.conf import settings
 from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
 from ..http_helpers import safe_json
@@ -14,20 +18,131 @@ from ..http_helpers import safe_json
 logger = logging.getLogger(__name__)
 
 
+_shared_session: Optional[Session] = None
+_shared_session_pid: Optional[int] = None
+_shared_session_lock = threading.Lock()
+
+
 def get_http_session() -> Session:
     """Creates and returns a new Session instance with AAP credentials."""
     session = Session()
     session.auth = HTTPBasicAuth(settings.AAP_USERNAME, settings.AAP_PASSWORD)
     session.verify = settings.AAP_VALIDATE_CERTS
     session.headers.update({"Content-Type": "application/json"})
+
+    adapter = HTTPAdapter(
+        pool_connections=settings.AAP_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.AAP_HTTP_POOL_SIZE,
+        pool_block=settings.AAP_HTTP_POOL_BLOCK,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     return session
 
 
-def get(url: str, *, params: Optional[Dict] = None) -> requests.Response:
-    with get_http_session() as session:
-        response = session.get(url, params=params, stream=True)
-        response.raise_for_status()
-        return response
+def get_shared_session() -> Session:
+    """
+    Returns the long-lived Session of the current process.
+
+    The session keeps connections to AAP alive between tasks, so a worker only
+    pays the TCP/TLS handshake once per pooled connection. It is rebuilt when
+    the process ID changes, so a forked worker never reuses sockets inherited
+    from its parent. Callers must not close it.
+    """
+    global _shared_session, _shared_session_pid
+
+    with _shared_session_lock:
+        if _shared_session is None or _shared_session_pid != os.getpid():
+            _shared_session = get_http_session()
+            _shared_session_pid = os.getpid()
+        return _shared_session
+
+
+def reset_shared_session() -> None:
+    """
+    Drops the shared session so the next caller builds a new one.
+
+    The old session is not closed, as its sockets may still belong to the
+    parent process after a fork.
+    """
+    global _shared_session, _shared_session_pid
+
+    _shared_session = None
+    _shared_session_pid = None
+
+
+os.register_at_fork(after_in_child=reset_shared_session)
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Returns connection statistics for each host pool of the shared session."""
+    stats: List[Dict[str, Any]] = []
+    session = _shared_session
+    if session is None or _shared_session_pid != os.getpid():
+        return stats
+
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats.append(
+                {
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "num_connections": pool.num_connections,
+                    "num_requests": pool.num_requests,
+                    "available": pool.pool.qsize() if pool.pool else 0,
+                    "max_size": pool.pool.maxsize if pool.pool else 0,
+                }
+            )
+    return stats
+
+
+def get(
+    url: str,
+    *,
+    params: Optional[Dict] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """
+    Streams a resource from AAP.
+    Args:
+        url: Absolute URL of the resource.
+        params: Optional query parameters.
+        validators: ETag/Last-Modified values from an earlier response, as
+            returned by get_validators(). When given, the request is made
+            conditional and a 304 response is returned as-is.
+    Returns:
+        The streamed response.
+    Raises:
+        requests.HTTPError
+    """
+    headers = {}
+    if validators:
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = get_shared_session().get(
+        url, params=params, headers=headers, stream=True
+    )
+    response.raise_for_status()
+    return response
+
+
+def get_validators(response: requests.Response) -> Dict[str, str]:
+    """Returns the cache validators sent with a response, if any."""
+    validators = {}
+    if etag := response.headers.get("ETag"):
+        validators["etag"] = etag
+    if last_modified := response.headers.get("Last-Modified"):
+        validators["last_modified"] = last_modified
+    return validators
 
 
 def post(session: requests.Session, path: str, data: Dict) -> Dict[str, Any]:
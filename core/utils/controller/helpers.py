@@ -1,37 +1,59 @@
 import contextlib
+import fnmatch
+import functools
+import glob
 import logging
 import os
-import random
-import shutil
 import tarfile
-import tempfile
-import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from http import HTTPStatus
+from typing import IO
 from typing import Any
+from typing import BinaryIO
 from typing import Dict
+from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import Literal
+from typing import Mapping
 from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import cast
 from urllib.parse import urljoin
 
 import requests
+from ansible_base.lib.utils.models import current_user_or_system_user
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from requests.exceptions import HTTPError
 from requests.exceptions import RequestException
 from requests.exceptions import Timeout
 
+from core.models import Automation
 from core.models import ControllerLabel
 from core.models import Pattern
 from core.models import PatternInstance
 
-from ..http_helpers import RetryError
+from ..cache import ArtifactCache
+from ..cache import get_artifact_cache
+from ..cache import get_label_cache
+from ..cache import get_role_definition_cache
+from ..dag import Step
+from ..dag import run_steps
 from .client import get
+from .client import get_validators
 from .client import post
+from .plan import ProvisioningPlan
 
 logger = logging.getLogger(__name__)
 
+ARTIFACT_CHUNK_SIZE = 64 * 1024
+EXECUTE_ROLE_NAME = "JobTemplate Execute"
+
 
 def build_collection_uri(collection_name: str, version: str) -> str:
     """
@@ -52,85 +74,187 @@ def build_collection_uri(collection_name: str, version: str) -> str:
 
 
 @contextlib.contextmanager
-def download_collection(collection_name: str, version: str) -> Iterator[str]:
+def open_collection_artifact(collection_name: str, version: str) -> Iterator[BinaryIO]:
     """
-    Downloads and extracts a collection tarball from private automation hub to a
-    temporary directory.
+    Opens a collection tarball, downloading it from private automation hub only
+    when it is not already in the local artifact cache.
+
+    With ARTIFACT_CACHE_REVALIDATE enabled, a cached tarball is revalidated
+    with a conditional GET using the ETag and Last-Modified values stored with
+    it, and is only downloaded again when automation hub reports a change. If
+    the revalidation request fails, the cached tarball is used as is.
 
     Args:
         collection_name: The name of the collection (e.g., 'my_namespace.my_collection').
         version: The version of the collection (e.g., '1.0.0').
 
     Yields:
-        The path to the extracted collection files.
+        The cached tarball, opened for binary reading.
     """
-    response = None
-    temp_base_dir = tempfile.mkdtemp()
-    collection_path = os.path.join(temp_base_dir, f"{collection_name}-{version}")
-    os.makedirs(collection_path, exist_ok=True)
-    path = build_collection_uri(collection_name, version)
-
+    cache = get_artifact_cache()
+    url = build_collection_uri(collection_name, version)
+
+    with cache.lock(collection_name, version):
+        artifact = cache.open_artifact(collection_name, version)
+        if artifact is None:
+            artifact = _store_artifact(cache, collection_name, version, url, get(url))
+        elif settings.ARTIFACT_CACHE_REVALIDATE:
+            entry = cache.get_entry(collection_name, version) or {}
+            try:
+                response = get(url, validators=entry.get("validators"))
+            except RequestException as e:
+                # Published collection versions don't change, so the cached
+                # copy is a safe fallback while automation hub is unreachable
+                logger.warning(
+                    f"Could not revalidate cached artifact for {url}, using it: {e}"
+                )
+            except BaseException:
+                artifact.close()
+                raise
+            else:
+                if response.status_code == HTTPStatus.NOT_MODIFIED:
+                    logger.debug(f"Cached artifact for {url} is still current")
+                    response.close()
+                else:
+                    artifact.close()
+                    artifact = _store_artifact(
+                        cache, collection_name, version, url, response
+                    )
+
+    with artifact:
+        yield artifact
+
+
+def _store_artifact(
+    cache: ArtifactCache,
+    collection_name: str,
+    version: str,
+    url: str,
+    response: requests.Response,
+) -> BinaryIO:
     try:
-        response = get(path)
+        return cache.store(
+            collection_name,
+            version,
+            response.iter_content(chunk_size=ARTIFACT_CHUNK_SIZE),
+            url=url,
+            validators=get_validators(response),
+        )
+    finally:
+        response.close()  # Explicitly close the response object
 
-        with tarfile.open(fileobj=response.raw, mode="r|gz") as tar:
-            tar.extractall(path=collection_path, filter="data")
 
-        logger.info(f"Collection extracted to {collection_path}")
-        yield collection_path  # Yield the path to the caller
-    finally:
-        if response:
-            response.close()  # Explicitly close the response object
-        shutil.rmtree(temp_base_dir)
+def read_collection_files(
+    collection_name: str, version: str, paths: Iterable[str]
+) -> Dict[str, bytes]:
+    """
+    Reads selected files from a collection tarball into memory without
+    extracting the archive to disk.
+
+    The tarball is walked as a stream. Paths may contain shell-style wildcards,
+    which match within a single path segment; when only literal paths are
+    requested, reading stops as soon as every one of them has been found.
+    Cached artifacts are read from the local artifact cache; otherwise, when
+    ARTIFACT_STREAM_ON_MISS is enabled, the files are read straight from the
+    automation hub response body, which is closed early instead of downloaded
+    in full.
+
+    Args:
+        collection_name: The name of the collection (e.g., 'my_namespace.my_collection').
+        version: The version of the collection (e.g., '1.0.0').
+        paths: Paths or wildcard patterns of the wanted files, relative to the
+            collection root.
+
+    Returns:
+        The content of each matching file that was found, keyed by path.
+    """
+    wanted = {os.path.normpath(path) for path in paths}
+
+    if (
+        settings.ARTIFACT_STREAM_ON_MISS
+        and get_artifact_cache().get_entry(collection_name, version) is None
+    ):
+        response = get(build_collection_uri(collection_name, version))
+        try:
+            return _read_tar_members(cast(IO[bytes], response.raw), wanted)
+        finally:
+            response.close()
+
+    with open_collection_artifact(collection_name, version) as artifact:
+        return _read_tar_members(artifact, wanted)
+
+
+def _path_matches(name: str, pattern: str) -> bool:
+    name_parts = name.split("/")
+    pattern_parts = pattern.split("/")
+    return len(name_parts) == len(pattern_parts) and all(
+        fnmatch.fnmatchcase(part, pattern_part)
+        for part, pattern_part in zip(name_parts, pattern_parts)
+    )
+
+
+def _read_tar_members(fileobj: IO[bytes], wanted: Set[str]) -> Dict[str, bytes]:
+    literals = {path for path in wanted if not glob.has_magic(path)}
+    patterns = wanted - literals
+    found: Dict[str, bytes] = {}
+
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in tar:
+            name = os.path.normpath(member.name)
+            if not member.isfile():
+                continue
+            if name not in literals and not any(
+                _path_matches(name, pattern) for pattern in patterns
+            ):
+                continue
+
+            extracted = tar.extractfile(member)
+            if extracted is not None:
+                found[name] = extracted.read()
+            if not patterns and len(found) == len(literals):
+                break
+
+    return found
 
 
 def create_project(
-    session: requests.Session, instance: PatternInstance, pattern: Pattern
+    session: requests.Session, instance: PatternInstance, plan: ProvisioningPlan
 ) -> int:
     """
-    Creates a controller project on AAP using the pattern definition.
+    Creates a controller project on AAP from the provisioning plan. The
+    project syncs in the background; use get_project_sync_statuses to follow it.
     Args:
         instance (PatternInstance): The PatternInstance object.
-        pattern (Pattern): The related Pattern object.
+        plan (ProvisioningPlan): The provisioning plan of the pattern.
     Returns:
         The created project ID.
     """
-    project_def = pattern.pattern_definition["aap_resources"]["controller_project"]
-    project_def.update(
-        {
-            "organization": instance.organization_id,
-            "scm_type": "archive",
-            "scm_url": pattern.collection_version_uri,
-            "credential": instance.credentials.get("project"),
-        }
-    )
+    project_def = {
+        **plan.project,
+        "organization": instance.organization_id,
+        "credential": instance.credentials.get("project"),
+    }
     logger.debug(f"Project definition: {project_def}")
     project_id = post(session, "/api/controller/v2/projects/", project_def)["id"]
-    wait_for_project_sync(session, project_id)
     return int(project_id)
 
 
 def create_execution_environment(
-    session: requests.Session, instance: PatternInstance, pattern_def: Dict[str, Any]
+    session: requests.Session, instance: PatternInstance, plan: ProvisioningPlan
 ) -> int:
     """
     Creates an execution environment for the controller.
     Args:
         instance (PatternInstance): The PatternInstance object.
-        pattern_def (Dict[str, Any]): The pattern definition dictionary.
+        plan (ProvisioningPlan): The provisioning plan of the pattern.
     Returns:
         The created execution environment ID.
     """
-    ee_def = pattern_def["aap_resources"]["controller_execution_environment"]
-    image_name = ee_def.pop("image_name")
-    ee_def.update(
-        {
-            "organization": instance.organization_id,
-            "credential": instance.credentials.get("ee"),
-            "image": f"{urllib.parse.urlparse(settings.AAP_URL).netloc}/{image_name}",
-            "pull": ee_def.get("pull", ""),
-        }
-    )
+    ee_def = {
+        **plan.execution_environment,
+        "organization": instance.organization_id,
+        "credential": instance.credentials.get("ee"),
+    }
     logger.debug(f"Execution Environment definition: {ee_def}")
     return int(
         post(session, "/api/controller/v2/execution_environments/", ee_def)["id"]
@@ -138,78 +262,141 @@ def create_execution_environment(
 
 
 def create_labels(
-    session: requests.Session, instance: PatternInstance, pattern_def: Dict[str, Any]
+    session: requests.Session, instance: PatternInstance, plan: ProvisioningPlan
 ) -> List[ControllerLabel]:
     """
     Creates controller labels and returns model instances.
+
+    Label IDs already known for the organization are taken from the label
+    cache; the missing labels are created concurrently, at most
+    INSTANCE_PROVISIONING_CONCURRENCY at a time. The local rows are then
+    written and read back with one query each.
     Args:
         instance (PatternInstance): The PatternInstance object.
-        pattern_def (Dict[str, Any]): The pattern definition dictionary.
+        plan (ProvisioningPlan): The provisioning plan of the pattern.
     Returns:
-        List of ControllerLabel model instances.
+        List of ControllerLabel model instances, in the order of the label names.
     """
-    labels = []
-    for name in pattern_def["aap_resources"]["controller_labels"]:
-        label_def = {"name": name, "organization": instance.organization_id}
-        logger.debug(f"Creating label with definition: {label_def}")
+    cache = get_label_cache()
+    names = plan.labels
+    label_ids: Dict[str, int] = {}
+    for name in names:
+        label_id = cache.get(f"{instance.organization_id}:{name}")
+        if label_id is not None:
+            label_ids[name] = label_id
+
+    missing = [name for name in names if name not in label_ids]
+    if missing:
+        with ThreadPoolExecutor(
+            max_workers=settings.INSTANCE_PROVISIONING_CONCURRENCY
+        ) as executor:
+            created_ids = executor.map(
+                lambda name: _create_label(session, instance.organization_id, name),
+                missing,
+            )
+            for name, label_id in zip(missing, created_ids):
+                cache.set(f"{instance.organization_id}:{name}", label_id)
+                label_ids[name] = label_id
+
+    user = current_user_or_system_user()
+    ControllerLabel.objects.bulk_create(
+        [
+            ControllerLabel(label_id=label_id, created_by=user, modified_by=user)
+            for label_id in label_ids.values()
+        ],
+        ignore_conflicts=True,
+    )
+    labels = {
+        label.label_id: label
+        for label in ControllerLabel.objects.filter(label_id__in=label_ids.values())
+    }
+    return [labels[label_ids[name]] for name in names]
 
-        results = post(session, "/api/controller/v2/labels/", label_def)
-        label_obj, _ = ControllerLabel.objects.get_or_create(label_id=results["id"])
-        labels.append(label_obj)
 
-    return labels
+def _create_label(session: requests.Session, organization_id: int, name: str) -> int:
+    label_def = {"name": name, "organization": organization_id}
+    logger.debug(f"Creating label with definition: {label_def}")
+    label_id: int = post(session, "/api/controller/v2/labels/", label_def)["id"]
+    return label_id
 
 
 def create_job_templates(
     session: requests.Session,
     instance: PatternInstance,
-    pattern_def: Dict[str, Any],
+    plan: ProvisioningPlan,
     project_id: int,
     ee_id: int,
 ) -> List[Dict[str, Any]]:
     """
     Creates job templates and associated surveys.
+
+    Job templates are created concurrently, at most
+    INSTANCE_PROVISIONING_CONCURRENCY at a time, and each survey is added
+    as soon as its own job template exists.
     Args:
         instance (PatternInstance): The PatternInstance object.
-        pattern_def (Dict[str, Any]): The pattern definition dictionary.
+        plan (ProvisioningPlan): The provisioning plan of the pattern.
         project_id (int): Controller project ID.
         ee_id (int): Execution environment ID.
     Returns:
-        List of dictionaries describing created automations.
+        List of dictionaries describing created automations, in the order of
+        the job template definitions.
     """
-    automations = []
-    jt_defs = pattern_def["aap_resources"]["controller_job_templates"]
-
-    for jt in jt_defs:
-        survey = jt.pop("survey", None)
-        primary = jt.pop("primary", False)
-
+    steps = []
+    for index, jt in enumerate(plan.job_templates):
         jt_payload = {
-            **jt,
+            **jt.payload,
             "organization": instance.organization_id,
             "project": project_id,
             "execution_environment": ee_id,
-            "playbook": (
-                f"extensions/patterns/{pattern_def['name']}/playbooks/{jt['playbook']}"
-            ),
-            "ask_inventory_on_launch": True,
         }
-
-        logger.debug(f"Creating job template with payload: {jt_payload}")
-        jt_res = post(session, "/api/controller/v2/job_templates/", jt_payload)
-        jt_id = jt_res["id"]
-
-        if survey:
-            logger.debug(f"Adding survey to job template {jt_id}")
-            post(
-                session,
-                f"/api/controller/v2/job_templates/{jt_id}/survey_spec/",
-                survey,
+        steps.append(
+            Step(
+                f"job_template_{index}",
+                functools.partial(_create_job_template, session, jt_payload, jt.survey),
             )
+        )
 
-        automations.append({"type": "job_template", "id": jt_id, "primary": primary})
+    created = run_steps(
+        steps, max_workers=settings.INSTANCE_PROVISIONING_CONCURRENCY
+    ).results
+    return [
+        {"type": "job_template", "id": created[step.name], "primary": jt.primary}
+        for step, jt in zip(steps, plan.job_templates)
+    ]
 
-    return automations
+
+def _create_job_template(
+    session: requests.Session,
+    jt_payload: Dict[str, Any],
+    survey: Optional[Mapping[str, Any]],
+) -> int:
+    logger.debug(f"Creating job template with payload: {jt_payload}")
+    jt_res = post(session, "/api/controller/v2/job_templates/", jt_payload)
+    jt_id: int = jt_res["id"]
+
+    if survey:
+        logger.debug(f"Adding survey to job template {jt_id}")
+        post(
+            session,
+            f"/api/controller/v2/job_templates/{jt_id}/survey_spec/",
+            dict(survey),
+        )
+    return jt_id
+
+
+class RoleAssignmentError(Exception):
+    """Raised when role assignments failed for some of the assignees."""
+
+    def __init__(self, failures: Dict[str, List[str]]) -> None:
+        super().__init__(
+            "Role assignment failed for "
+            + "; ".join(
+                f"{assignee} ({', '.join(errors)})"
+                for assignee, errors in sorted(failures.items())
+            )
+        )
+        self.failures = failures
 
 
 def create_controller_role_assignment(
@@ -232,12 +419,19 @@ def get_role_definition_id(session: requests.Session, role_name: str) -> Optiona
     """
     Fetches the role definition ID for a given role name and content type.
 
+    Found IDs are cached for ROLE_DEFINITION_CACHE_TTL seconds.
+
     Args:
         role_name (str): The name of the role.
 
     Returns:
         Optional[str]: The role ID if found, otherwise None.
     """
+    cache = get_role_definition_cache()
+    cached_id: Optional[str] = cache.get(role_name)
+    if cached_id is not None:
+        return cached_id
+
     params = {"name": role_name}
     url = urllib.parse.urljoin(settings.AAP_URL, "/api/controller/v2/role_definitions/")
 
@@ -249,6 +443,7 @@ def get_role_definition_id(session: requests.Session, role_name: str) -> Optiona
         if roles_resp.get("results"):
             role_id: str = roles_resp["results"][0]["id"]
             logger.debug(f"Found role '{role_name}': {role_id}")
+            cache.set(role_name, role_id)
             return role_id
         else:
             logger.warning(f"No role found for name={role_name}")
@@ -259,6 +454,19 @@ def get_role_definition_id(session: requests.Session, role_name: str) -> Optiona
         return None
 
 
+def _role_definition_exists(session: requests.Session, role_id: str) -> bool:
+    """Returns False only if the controller reports the role definition missing."""
+    url = urllib.parse.urljoin(
+        settings.AAP_URL, f"/api/controller/v2/role_definitions/{role_id}/"
+    )
+    try:
+        response = session.get(url)
+    except RequestException as e:
+        logger.warning(f"Could not check role definition {role_id}: {e}")
+        return True
+    return response.status_code != HTTPStatus.NOT_FOUND
+
+
 def assign_execute_roles(
     session: requests.Session,
     executors: Dict[str, List[Any]],
@@ -267,108 +475,131 @@ def assign_execute_roles(
     """
     Assigns JobTemplate Execute role to teams and users via the AAP controller.
 
+    The controller takes one assignment per request, so the requests are sent
+    concurrently over the session, at most ROLE_ASSIGNMENT_CONCURRENCY at a
+    time. A failed assignment doesn't stop the others.
+
     Args:
         executors (Dict[str, List[Any]]): Dictionary with "teams" and "users" lists.
         automations (List[Dict[str, Any]]): List of job template metadata.
+
+    Raises:
+        RoleAssignmentError: With the failed assignments of each assignee, once
+            all assignments have been attempted.
     """
     if not executors or (not executors.get("teams") and not executors.get("users")):
         logger.debug("No executors provided; skipping role assignment.")
         return
 
     # Get role ID
-    role_id = get_role_definition_id(session, "JobTemplate Execute")
+    role_id = get_role_definition_id(session, EXECUTE_ROLE_NAME)
     if not role_id:
-        raise ValueError("Could not find 'JobTemplate Execute' role.")
+        raise ValueError(f"Could not find '{EXECUTE_ROLE_NAME}' role.")
     logger.debug(f"Job template execute role ID: {role_id}")
 
     # Apply job template execute role to supplied teams/users
-    for automation in automations:
-        jt_id = automation["id"]
-
-        for team in executors.get("teams", []):
-            create_controller_role_assignment(
-                session, "team", jt_id, role_id, str(team)
-            )
+    assignee_keys: Tuple[Tuple[Literal["team", "user"], str], ...] = (
+        ("team", "teams"),
+        ("user", "users"),
+    )
+    assignments = [
+        (assignee_type, str(assignee), automation["id"])
+        for automation in automations
+        for assignee_type, key in assignee_keys
+        for assignee in executors.get(key, [])
+    ]
+    failures: Dict[str, List[str]] = {}
+    rejected = False
+
+    with ThreadPoolExecutor(
+        max_workers=settings.ROLE_ASSIGNMENT_CONCURRENCY
+    ) as executor:
+        futures = {
+            executor.submit(
+                create_controller_role_assignment,
+                session,
+                assignee_type,
+                jt_id,
+                role_id,
+                assignee,
+            ): (assignee_type, assignee, jt_id)
+            for assignee_type, assignee, jt_id in assignments
+        }
+        for future in as_completed(futures):
+            assignee_type, assignee, jt_id = futures[future]
+            try:
+                future.result()
+            except RequestException as e:
+                logger.warning(
+                    f"Could not assign role to {assignee_type} {assignee} "
+                    f"on job template {jt_id}: {e}"
+                )
+                failures.setdefault(f"{assignee_type} {assignee}", []).append(
+                    f"job template {jt_id}: {e}"
+                )
+                if e.response is not None and e.response.status_code in (400, 404):
+                    rejected = True
 
-        for user in executors.get("users", []):
-            create_controller_role_assignment(
-                session, "user", jt_id, role_id, str(user)
-            )
+    # A missing team, user or job template is rejected the same way as a
+    # cached role definition that was deleted from the controller
+    if rejected and not _role_definition_exists(session, role_id):
+        get_role_definition_cache().invalidate(EXECUTE_ROLE_NAME)
+    if failures:
+        raise RoleAssignmentError(failures)
 
 
-def wait_for_project_sync(
-    session: requests.Session,
-    project_id: str,
-    *,
-    max_retries: int = 15,
-    initial_delay: float = 1,
-    max_delay: float = 60,
-    timeout: float = 30,
-) -> None:
+def get_project_sync_statuses(
+    session: requests.Session, project_ids: Iterable[int], *, timeout: float = 30
+) -> Dict[int, str]:
     """
-    Polls the AAP Controller project endpoint until the project sync completes
-    successfully.
-    This function checks the sync status of a project using its ID. It will keep
-    polling until the status becomes 'successful', or until a maximum number of
-    retries is reached. Uses exponential backoff with jitter between retries.
+    Fetches the sync status of many controller projects with one filtered
+    list request per batch of PROJECT_SYNC_BATCH_SIZE projects, instead of
+    one request per project.
+
+    Transient errors are logged and the affected projects are left out of the
+    result, so callers treat them as "still syncing" and check again later.
     Args:
-        project_id (str): The numeric ID of the project to monitor.
-        max_retries (int): Maximum number of times to retry checking the status.
-        initial_delay (float): Delay in seconds before the first retry.
-        max_delay (float): Upper limit on delay between retries.
+        project_ids (Iterable[int]): The numeric IDs of the projects to check.
         timeout (float): Timeout in seconds for each HTTP request.
+    Returns:
+        A mapping of project ID to its status ("pending", "successful", ...).
     Raises:
-        RetryError: If the project does not sync after all retries.
-        HTTPError: For non-retryable 4xx/5xx errors.
-        RequestException: For connection-related errors (e.g., network failures).
+        HTTPError: For non-retryable 4xx errors.
     """
-    url = urllib.parse.urljoin(
-        settings.AAP_URL, f"/api/controller/v2/projects/{project_id}"
-    )
-    delay = initial_delay
-
-    for attempt in range(1, max_retries + 1):
+    ids = sorted(set(project_ids))
+    batch_size = settings.PROJECT_SYNC_BATCH_SIZE
+    statuses: Dict[int, str] = {}
+
+    while ids:
+        batch, ids = ids[:batch_size], ids[batch_size:]
+        url: Optional[str] = urllib.parse.urljoin(
+            settings.AAP_URL, "/api/controller/v2/projects/"
+        )
+        params: Optional[Dict[str, Any]] = {
+            "id__in": ",".join(str(project_id) for project_id in batch),
+            "page_size": len(batch),
+        }
         try:
-            response = session.get(url, timeout=timeout)
-            response.raise_for_status()
-            status = response.json().get("status")
-            if status == "successful":
-                logger.info(
-                    f"Project {project_id} synced successfully on attempt {attempt}."
-                )
-                return
-
-            if status in ("failed", "error", "canceled"):
-                raise RetryError(
-                    f"Project {project_id} sync failed with status: '{status}'."
-                )
-
-            logger.info(f"Project {project_id} status: '{status}'. Retrying...")
-
+            while url:
+                response = session.get(url, params=params, timeout=timeout)
+                response.raise_for_status()
+                data = response.json()
+                for project in data.get("results", []):
+                    statuses[project["id"]] = project.get("status")
+                # "next" already carries the query string
+                url = data.get("next") and urljoin(settings.AAP_URL, data["next"])
+                params = None
         except HTTPError as e:
             if (
                 e.response.status_code not in (408, 429)
                 and 400 <= e.response.status_code < 500
             ):
                 raise
-            logger.warning(
-                f"Retryable HTTP error ({e.response.status_code}) on attempt {attempt}"
-            )
+            logger.warning(f"Retryable HTTP error ({e.response.status_code})")
         except (Timeout, RequestException) as e:
-            logger.warning(f"Network error on attempt {attempt}: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error on attempt {attempt}: {e}")
+            logger.warning(f"Network error checking projects {batch}: {e}")
 
-        if attempt == max_retries:
-            raise RetryError(
-                f"Project {project_id} failed to sync after {max_retries} attempts."
-            )
-
-        jitter = random.uniform(0.8, 1.2)
-        sleep_time = min(delay * jitter, max_delay)
-        logger.debug(f"Waiting {sleep_time:.2f}s before retry #{attempt + 1}...")
-        time.sleep(sleep_time)
-        delay *= 2
+    return statuses
 
 
 def save_instance_state(
@@ -380,6 +611,9 @@ def save_instance_state(
 ) -> None:
     """
     Saves the instance and links labels and automations inside a DB transaction.
+
+    Labels are linked with one M2M add and automations inserted with one
+    bulk_create, so the number of queries doesn't grow with their count.
     Args:
         instance: The PatternInstance to update.
         project_id: Controller project ID.
@@ -391,11 +625,79 @@ def save_instance_state(
         instance.controller_project_id = project_id
         instance.controller_ee_id = ee_id
         instance.save()
-        for label in labels:
-            instance.controller_labels.add(label)
-        for auto in automations:
-            instance.automations.create(
-                automation_type=auto["type"],
-                automation_id=auto["id"],
-                primary=auto["primary"],
+        instance.controller_labels.add(*labels)
+        user = current_user_or_system_user()
+        Automation.objects.bulk_create(
+            [
+                Automation(
+                    pattern_instance=instance,
+                    automation_type=auto["type"],
+                    automation_id=auto["id"],
+                    primary=auto["primary"],
+                    created_by=user,
+                    modified_by=user,
+                )
+                for auto in automations
+            ]
+        )
+
+
+def save_collection_patterns(
+    collection_name: str, version: str, definitions: Dict[str, Dict[str, Any]]
+) -> List[Pattern]:
+    """
+    Creates or updates the patterns of a collection version inside a single
+    DB transaction.
+    Args:
+        collection_name: The collection name.
+        version: The collection version.
+        definitions: Pattern definitions keyed by pattern name.
+    Returns:
+        The created and updated Pattern objects.
+    """
+    collection_version_uri = build_collection_uri(collection_name, version)
+    user = current_user_or_system_user()
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {
+            pattern.pattern_name: pattern
+            for pattern in Pattern.objects.select_for_update().filter(
+                collection_name=collection_name,
+                collection_version=version,
+                pattern_name__in=definitions,
             )
+        }
+        for name, pattern in existing.items():
+            pattern.set_definition(definitions[name])
+            pattern.collection_version_uri = collection_version_uri
+            pattern.modified = now
+            pattern.modified_by = user
+        Pattern.objects.bulk_update(
+            existing.values(),
+            [
+                "pattern_definition",
+                *Pattern.CATALOG_FIELDS,
+                "collection_version_uri",
+                "modified",
+                "modified_by",
+            ],
+        )
+
+        new_patterns = []
+        for name, definition in definitions.items():
+            if name in existing:
+                continue
+            pattern = Pattern(
+                collection_name=collection_name,
+                collection_version=version,
+                collection_version_uri=collection_version_uri,
+                pattern_name=name,
+                created_by=user,
+                modified_by=user,
+            )
+            pattern.set_definition(definition)
+            new_patterns.append(pattern)
+        created = Pattern.objects.bulk_create(new_patterns)
+
+    return [*existing.values(), *created]
@@ -0,0 +1,137 @@
+import copy
+import urllib.parse
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+
+from core.models import Pattern
+
+from ..cache import get_provisioning_plan_cache
+from ..pattern_schema import validate_pattern_definition
+
+
+@dataclass(frozen=True)
+class JobTemplatePlan:
+    """
+    A job template of a provisioning plan.
+
+    Args:
+        payload: Job template fields that are the same in every organization.
+        survey: Survey spec added once the job template exists, if any.
+        primary: Whether this is the primary automation of the pattern.
+    """
+
+    payload: Mapping[str, Any]
+    survey: Optional[Mapping[str, Any]]
+    primary: bool
+
+
+@dataclass(frozen=True)
+class ProvisioningPlan:
+    """
+    The controller resources of a pattern, precomputed from its definition.
+
+    A plan is built once per pattern version and never changes, so it can be
+    shared by any number of instances provisioned at the same time. Each
+    instance only overlays its own organization, credentials and IDs on the
+    top-level payloads; nested values are shared between instances and must
+    not be modified.
+
+    Args:
+        pattern_name: Name of the pattern.
+        project: Project fields that are the same in every organization.
+        execution_environment: Same for the execution environment.
+        labels: Names of the labels, without duplicates.
+        job_templates: The job templates, in the order of the definition.
+    """
+
+    pattern_name: str
+    project: Mapping[str, Any]
+    execution_environment: Mapping[str, Any]
+    labels: Tuple[str, ...]
+    job_templates: Tuple[JobTemplatePlan, ...]
+
+    @classmethod
+    def from_pattern(cls, pattern: Pattern) -> "ProvisioningPlan":
+        """
+        Builds the plan of a pattern. The definition is copied once, so the
+        plan doesn't change when the pattern does.
+        """
+        definition = copy.deepcopy(pattern.pattern_definition)
+        resources = definition["aap_resources"]
+
+        ee_def = resources["controller_execution_environment"]
+        image_name = ee_def.pop("image_name")
+        registry = urllib.parse.urlparse(settings.AAP_URL).netloc
+
+        job_templates = []
+        for jt in resources["controller_job_templates"]:
+            survey = jt.pop("survey", None)
+            primary = jt.pop("primary", False)
+            payload = {
+                **jt,
+                "playbook": (
+                    f"extensions/patterns/{definition['name']}/playbooks/"
+                    f"{jt['playbook']}"
+                ),
+                "ask_inventory_on_launch": True,
+            }
+            job_templates.append(
+                JobTemplatePlan(
+                    payload=MappingProxyType(payload),
+                    survey=MappingProxyType(survey) if survey else None,
+                    primary=primary,
+                )
+            )
+
+        return cls(
+            pattern_name=definition["name"],
+            project=MappingProxyType(
+                {
+                    **resources["controller_project"],
+                    "scm_type": "archive",
+                    "scm_url": pattern.collection_version_uri,
+                }
+            ),
+            execution_environment=MappingProxyType(
+                {
+                    **ee_def,
+                    "image": f"{registry}/{image_name}",
+                    "pull": ee_def.get("pull", ""),
+                }
+            ),
+            labels=tuple(dict.fromkeys(resources.get("controller_labels", []))),
+            job_templates=tuple(job_templates),
+        )
+
+
+def get_provisioning_plan(pattern: Pattern) -> ProvisioningPlan:
+    """
+    Returns the provisioning plan of a pattern version from the plan cache of
+    the worker, keyed by pattern ID and modification time.
+
+    On a miss, the definition is loaded if it was deferred, validated and
+    turned into a plan, so each version of a pattern is decoded and validated
+    only once per worker however many instances are provisioned from it.
+
+    Raises:
+        ValueError: If the pattern has no definition.
+        PatternValidationError: If the definition doesn't match the schema.
+    """
+    cache = get_provisioning_plan_cache()
+    key = (pattern.id, pattern.modified)
+    plan: Optional[ProvisioningPlan] = cache.get(key)
+    if plan is None:
+        if "pattern_definition" in pattern.get_deferred_fields():
+            pattern.refresh_from_db(fields=["pattern_definition"])
+        if not pattern.pattern_definition:
+            raise ValueError("Pattern definition is missing.")
+        validate_pattern_definition(pattern.pattern_definition)
+        plan = ProvisioningPlan.from_pattern(pattern)
+        cache.set(key, plan)
+    return plan
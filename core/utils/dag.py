@@ -0,0 +1,111 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Tuple
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    A unit of work in a dependency graph.
+
+    Args:
+        name: Unique name of the step; its result is stored under this name.
+        func: Callable run for the step. It receives the results of the steps
+            it depends on as keyword arguments named after those steps.
+        depends_on: Names of the steps that must complete first.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class DagResult:
+    """Results and wall-clock durations (in seconds) of each completed step."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+
+
+def _run_step(step: Step, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.monotonic()
+    try:
+        return step.func(**kwargs), time.monotonic() - start
+    finally:
+        # Worker threads get their own DB connections; don't leak them
+        connections.close_all()
+
+
+def run_steps(steps: Iterable[Step], *, max_workers: int) -> DagResult:
+    """
+    Runs steps on a bounded thread pool, starting each one as soon as all of
+    its dependencies have completed.
+
+    If a step fails, steps that have not started yet are cancelled, running
+    steps are allowed to finish, and the first error is re-raised.
+
+    Args:
+        steps: The steps to run.
+        max_workers: Maximum number of steps running at the same time.
+
+    Returns:
+        The results and durations of every step.
+
+    Raises:
+        ValueError: If the steps reference unknown dependencies or form a cycle.
+    """
+    pending = {step.name: step for step in steps}
+    for step in pending.values():
+        unknown = set(step.depends_on) - pending.keys()
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown {unknown}.")
+
+    dag_result = DagResult()
+    running: Dict[Future, Step] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [
+                step
+                for step in pending.values()
+                if all(dep in dag_result.results for dep in step.depends_on)
+            ]
+            if not ready and not running:
+                raise ValueError(f"Steps {sorted(pending)} have cyclic dependencies.")
+
+            for step in ready:
+                del pending[step.name]
+                kwargs = {dep: dag_result.results[dep] for dep in step.depends_on}
+                logger.debug(f"Starting step '{step.name}'")
+                running[executor.submit(_run_step, step, kwargs)] = step
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    result, duration = future.result()
+                except Exception:
+                    logger.error(f"Step '{step.name}' failed; cancelling the rest.")
+                    for other in running:
+                        other.cancel()
+                    raise
+                dag_result.results[step.name] = result
+                dag_result.durations[step.name] = round(duration, 3)
+                logger.debug(f"Step '{step.name}' finished in {duration:.3f}s")
+
+    return dag_result
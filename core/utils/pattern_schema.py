@@ -0,0 +1,82 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+logger = logging.getLogger(__name__)
+
+
+class PatternValidationError(ValueError):
+    """
+    Raised when a pattern definition doesn't match the pattern schema.
+
+    Args:
+        errors: One {"path", "message"} dict per schema violation, where the
+            path is the JSON path of the invalid value, e.g. "$.aap_resources".
+    """
+
+    def __init__(self, errors: List[Dict[str, str]]) -> None:
+        self.errors = errors
+        super().__init__(
+            "Invalid pattern definition: "
+            + "; ".join(f"{error['path']}: {error['message']}" for error in errors)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_pattern_validator() -> Validator:
+    """
+    Loads the pattern schema from PATTERN_SCHEMA_PATH and returns a validator
+    for it. The schema is read and checked against its meta-schema only once
+    per process.
+    """
+    with open(settings.PATTERN_SCHEMA_PATH) as schema_file:
+        schema = json.load(schema_file)
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    logger.debug(f"Loaded pattern schema {schema.get('$id')}")
+    return validator_cls(schema)
+
+
+def validate_pattern_definition(
+    definition: Any, pattern_name: Optional[str] = None
+) -> None:
+    """
+    Validates a pattern definition against the pattern schema.
+
+    Args:
+        definition: The decoded pattern definition.
+        pattern_name: Name of the pattern directory the definition was read
+            from, which the definition's "name" must match.
+
+    Raises:
+        PatternValidationError: With every violation, ordered by path.
+    """
+    errors = [
+        {"path": error.json_path, "message": error.message}
+        for error in get_pattern_validator().iter_errors(definition)
+    ]
+    if (
+        pattern_name is not None
+        and isinstance(definition, dict)
+        and isinstance(definition.get("name"), str)
+        and definition["name"] != pattern_name
+    ):
+        errors.append(
+            {
+                "path": "$.name",
+                "message": (
+                    f"{definition['name']!r} does not match the pattern "
+                    f"directory {pattern_name!r}"
+                ),
+            }
+        )
+    if errors:
+        raise PatternValidationError(sorted(errors, key=lambda e: e["path"]))
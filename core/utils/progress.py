@@ -0,0 +1,88 @@
+import logging
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+
+class TaskProgress:
+    """
+    Records the stages of a task in memory and writes them to the task's
+    details at most once per TASK_PROGRESS_FLUSH_INTERVAL seconds, and always
+    on terminal states.
+
+    The details keep the name of the current stage under "info", as before,
+    plus a "stages" history where every stage has a name, start, end and
+    duration (start and end are UNIX timestamps; an open stage has no end).
+    The history already stored on the task is carried over, so a task that
+    is resumed by another worker keeps its earlier stages.
+
+    Args:
+        task: The task to report progress for.
+        flush_interval: Minimum number of seconds between two writes of
+            non-terminal progress. Defaults to TASK_PROGRESS_FLUSH_INTERVAL.
+    """
+
+    def __init__(self, task: Task, flush_interval: Optional[float] = None) -> None:
+        self.task = task
+        self.flush_interval = (
+            settings.TASK_PROGRESS_FLUSH_INTERVAL
+            if flush_interval is None
+            else flush_interval
+        )
+        self.details: Dict[str, Any] = dict(task.details or {})
+        self.stages: List[Dict[str, Any]] = list(self.details.pop("stages", []))
+        self._last_flush: Optional[float] = None
+
+    def _close_stage(self, now: float) -> None:
+        if self.stages and self.stages[-1]["end"] is None:
+            stage = self.stages[-1]
+            stage["end"] = now
+            stage["duration"] = round(now - stage["start"], 3)
+
+    def start_stage(self, name: str, *, flush: bool = False, **extra: Any) -> None:
+        """
+        Ends the current stage and starts a new one.
+
+        Args:
+            name: Name of the stage, also reported as the task's "info".
+            flush: Write to the DB right away, e.g. when another process
+                picks the task up from this stage.
+            extra: Values to store in the details next to the stages.
+        """
+        now = time.time()
+        self._close_stage(now)
+        self.stages.append({"name": name, "start": now, "end": None, "duration": None})
+        self.details.update(extra, info=name)
+        logger.debug(f"Task {self.task.id}: {name}")
+
+        if (
+            flush
+            or self._last_flush is None
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self, status: str = Task.Status.RUNNING) -> None:
+        """Writes the status, the details and the stage history to the DB."""
+        self.task.set_status(status, {**self.details, "stages": self.stages})
+        self._last_flush = time.monotonic()
+
+    def complete(self, info: str, **extra: Any) -> None:
+        """Ends the current stage and marks the task completed."""
+        self._close_stage(time.time())
+        self.details = {**extra, "info": info}
+        self.flush(Task.Status.COMPLETED)
+
+    def fail(self, error: str, **extra: Any) -> None:
+        """Ends the current stage and marks the task failed."""
+        self._close_stage(time.time())
+        self.details = {**extra, "error": error}
+        self.flush(Task.Status.FAILED)
@@ -0,0 +1,110 @@
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+from typing import TextIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+TASK_ARCHIVE_FIELDS = [
+    "id",
+    "status",
+    "details",
+    "created",
+    "created_by_id",
+    "modified",
+    "modified_by_id",
+]
+
+
+@dataclass
+class PruneResult:
+    """Outcome of a prune_tasks run."""
+
+    deleted: int
+    seconds: float
+    archive_path: Optional[str] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.seconds if self.seconds else 0.0
+
+
+def prune_tasks(
+    older_than: timedelta,
+    *,
+    batch_size: int,
+    archive_dir: Optional[str] = None,
+) -> PruneResult:
+    """
+    Deletes completed and failed tasks last modified before ``older_than``
+    ago, optionally appending them to a gzipped JSON-lines archive first.
+
+    Rows are deleted in batches of ``batch_size``, each in its own short
+    transaction, so the table is never locked for long. Running tasks are
+    never touched.
+
+    Args:
+        older_than: Minimum age of the tasks to delete.
+        batch_size: Maximum number of rows deleted per transaction.
+        archive_dir: Directory of the archive files; tasks aren't archived
+            when None.
+
+    Returns:
+        The number of deleted rows, the elapsed time and the archive file.
+    """
+    cutoff = timezone.now() - older_than
+    expired = Task.objects.filter(
+        status__in=[Task.Status.COMPLETED, Task.Status.FAILED], modified__lt=cutoff
+    ).order_by("id")
+
+    archive_path = None
+    archive: Optional[TextIO] = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(
+            archive_dir, f"tasks-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz"
+        )
+
+    # Without an archive, only the IDs of the rows are needed
+    fields = TASK_ARCHIVE_FIELDS if archive_path else ["id"]
+    start = time.monotonic()
+    deleted = 0
+    try:
+        while True:
+            with transaction.atomic():
+                rows = list(expired.values(*fields)[:batch_size])
+                if not rows:
+                    break
+                if archive_path:
+                    if archive is None:
+                        archive = gzip.open(archive_path, "at")
+                    for row in rows:
+                        archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                    # On disk before the rows are gone
+                    archive.flush()
+                ids = [row["id"] for row in rows]
+                deleted += Task.objects.filter(id__in=ids).delete()[0]
+            logger.debug(f"Pruned {deleted} tasks so far")
+    finally:
+        if archive is not None:
+            archive.close()
+
+    result = PruneResult(
+        deleted, time.monotonic() - start, archive_path if archive else None
+    )
+    logger.info(
+        f"Pruned {result.deleted} tasks older than {cutoff:%Y-%m-%d %H:%M} in "
+        f"{result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)"
+    )
+    return result
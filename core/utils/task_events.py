@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import json
+import logging
+import weakref
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Optional
+from typing import Set
+
+import psycopg
+from django.db import connection
+from psycopg.conninfo import make_conninfo
+
+logger = logging.getLogger(__name__)
+
+TASK_STATUS_CHANNEL = "pattern_service_task_status"
+
+
+def notify_task_status(task_id: int, status: str) -> None:
+    """
+    Publishes a task status change with Postgres NOTIFY.
+
+    NOTIFY is transactional, so listeners hear about the change only once the
+    surrounding transaction commits. Does nothing on other databases, where
+    waiting clients fall back to polling.
+    """
+    if connection.vendor != "postgresql":
+        return
+    payload = json.dumps({"id": task_id, "status": status})
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [TASK_STATUS_CHANNEL, payload])
+
+
+class TaskStatusChanges:
+    """Status change notifications received for one task."""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Waits up to ``timeout`` seconds for the next change.
+
+        Returns:
+            True if a change was notified, False on timeout.
+        """
+        try:
+            await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        # Coalesce the changes that arrived in the meantime
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        return True
+
+
+class TaskStatusListener:
+    """
+    Shares a single LISTEN connection between all the clients waiting on task
+    status changes in one event loop.
+
+    The connection is opened on the first subscription, on the default
+    database that ``notify_task_status`` sends the notifications on. If it
+    fails, subscribers are simply not woken up, and fall back to re-reading
+    the task periodically.
+
+    Args:
+        conninfo: libpq connection string of the database to listen on.
+    """
+
+    def __init__(self, conninfo: str) -> None:
+        self.conninfo = conninfo
+        self._subscribers: Dict[int, Set[TaskStatusChanges]] = {}
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._ready = asyncio.Event()
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, task_id: int) -> AsyncIterator[TaskStatusChanges]:
+        """
+        Subscribes to the status changes of a task.
+
+        The listener is running once this returns, so a change made after the
+        caller reads the task is never missed.
+        """
+        changes = TaskStatusChanges()
+        self._subscribers.setdefault(task_id, set()).add(changes)
+        try:
+            if self._listener is None or self._listener.done():
+                self._ready.clear()
+                self._listener = asyncio.create_task(self._listen())
+            await self._ready.wait()
+            yield changes
+        finally:
+            subscribers = self._subscribers[task_id]
+            subscribers.discard(changes)
+            if not subscribers:
+                del self._subscribers[task_id]
+
+    def dispatch(self, payload: str) -> None:
+        """Hands a notification payload to the subscribers of its task."""
+        try:
+            change = json.loads(payload)
+            subscribers = self._subscribers.get(change["id"], ())
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed task status payload: {payload!r}")
+            return
+        for changes in subscribers:
+            changes.queue.put_nowait(change)
+
+    async def _listen(self) -> None:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                self.conninfo, autocommit=True
+            ) as conn:
+                await conn.execute(f"LISTEN {TASK_STATUS_CHANNEL}")
+                self._ready.set()
+                async for notify in conn.notifies():
+                    self.dispatch(notify.payload)
+        except Exception:
+            logger.exception("Task status listener stopped; waiting clients will poll.")
+        finally:
+            self._ready.set()
+
+
+def get_listen_conninfo() -> str:
+    """
+    Returns the libpq connection string of the default database, so that
+    status changes are listened to where they are notified.
+    """
+    # Drop the adapter context, cursor factory and other non-libpq parameters
+    params = {
+        key: value
+        for key, value in connection.get_connection_params().items()
+        if isinstance(value, (str, int))
+    }
+    return make_conninfo("", **params)
+
+
+_listeners: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TaskStatusListener]"
+_listeners = weakref.WeakKeyDictionary()
+
+
+@contextlib.asynccontextmanager
+async def task_status_changes(task_id: int) -> AsyncIterator[TaskStatusChanges]:
+    """
+    Subscribes to the status changes of a task through the listener of the
+    running event loop.
+
+    On databases without LISTEN/NOTIFY, no change is ever notified and
+    ``wait`` only returns on timeout, which makes callers poll.
+    """
+    if connection.vendor != "postgresql":
+        yield TaskStatusChanges()
+        return
+
+    loop = asyncio.get_running_loop()
+    listener = _listeners.get(loop)
+    if listener is None:
+        listener = _listeners[loop] = TaskStatusListener(get_listen_conninfo())
+    async with listener.subscribe(task_id) as changes:
+        yield changes
@@ -1,12 +1,37 @@
+import asyncio
+import json
+import math
 import uuid
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
 
 from ansible_base.lib.utils.views.ansible_base import AnsibleBaseView
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db import transaction
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_view
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
@@ -16,16 +41,25 @@ from core.models import ControllerLabel
 from core.models import Pattern
 from core.models import PatternInstance
 from core.models import Task
+from core.pagination import IdCursorPagination
 from core.serializers import AutomationSerializer
 from core.serializers import ControllerLabelSerializer
+from core.serializers import PatternCollectionSerializer
 from core.serializers import PatternInstanceSerializer
 from core.serializers import PatternSerializer
+from core.serializers import PatternSummarySerializer
 from core.serializers import TaskSerializer
+from core.serializers import TaskStatusSerializer
+from core.task_runner import run_pattern_collection_task
+from core.task_runner import run_pattern_instance_task
+from core.task_runner import run_pattern_task
+from core.tasks import submit_on_commit
 from core.tasks.demo import sumbit_hello_world
+from core.utils.task_events import task_status_changes
 
 
 class CoreViewSet(AnsibleBaseView):
-    pass
+    pagination_class: Optional[type[BasePagination]] = IdCursorPagination
 
 
 @extend_schema_view(
@@ -38,9 +72,44 @@ class CoreViewSet(AnsibleBaseView):
     ),
     list=extend_schema(
         description=(
-            "Retrieve information about all Ansible patterns added to the service."
+            "Retrieve information about all Ansible patterns added to the service, "
+            "optionally searching them by tag and text."
         ),
-        examples=[api_examples.pattern_get_response],
+        parameters=[
+            OpenApiParameter(
+                "tag",
+                str,
+                many=True,
+                description="Only return the patterns with this tag; repeatable.",
+            ),
+            OpenApiParameter(
+                "q",
+                str,
+                description=(
+                    "Only return the patterns with this text in their title, "
+                    "short description or name."
+                ),
+            ),
+            OpenApiParameter(
+                "fields",
+                str,
+                description=(
+                    "Comma-separated list of the fields to return. Pattern "
+                    "definitions are only returned when retrieving a single pattern."
+                ),
+            ),
+            OpenApiParameter(
+                "summary",
+                bool,
+                description=(
+                    "Only return the name, collection, title and tags of the patterns."
+                ),
+            ),
+        ],
+        examples=[
+            api_examples.pattern_list_response,
+            api_examples.pattern_summary_get_response,
+        ],
     ),
     retrieve=extend_schema(
         description="Retrieve information about a single Ansible pattern by ID.",
@@ -49,17 +118,82 @@ class CoreViewSet(AnsibleBaseView):
 )
 class PatternViewSet(CoreViewSet, ModelViewSet):
     http_method_names = ["get", "post", "delete", "head", "options"]
-    queryset = Pattern.objects.all()
+    queryset = Pattern.objects.select_related("created_by", "modified_by")
     serializer_class = PatternSerializer
 
+    @property
+    def summary(self) -> bool:
+        return self.request.query_params.get("summary", "").lower() in ("1", "true")
+
+    def get_list_fields(self) -> List[str]:
+        """
+        Returns the fields requested with ``?fields=``, or every field but
+        the pattern definition, which is only returned on retrieve.
+        """
+        list_fields = [
+            name
+            for name in PatternSerializer.Meta.fields
+            if name != "pattern_definition"
+        ]
+        if "fields" not in self.request.query_params:
+            return list_fields
+
+        fields = [
+            name.strip()
+            for name in self.request.query_params["fields"].split(",")
+            if name.strip()
+        ]
+        unknown = sorted(set(fields) - set(list_fields))
+        if unknown:
+            raise ValidationError(
+                {"fields": [f"Unknown fields {unknown}, must be in {list_fields}."]}
+            )
+        return fields
+
+    def get_serializer_class(self) -> type[BaseSerializer]:
+        if self.action == "list" and self.summary:
+            return PatternSummarySerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> BaseSerializer:
+        if self.action == "list" and not self.summary:
+            kwargs.setdefault("fields", self.get_list_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self) -> QuerySet[Pattern]:
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        for tag in params.getlist("tag"):
+            if connection.features.supports_json_field_contains:
+                # Served by the GIN index on Postgres
+                queryset = queryset.filter(tags__contains=[tag])
+            else:
+                queryset = queryset.filter(tags__icontains=json.dumps(tag))
+        if params.get("q"):
+            # Served by the trigram indexes on Postgres
+            queryset = queryset.filter(
+                Q(title__icontains=params["q"])
+                | Q(short_description__icontains=params["q"])
+                | Q(pattern_name__icontains=params["q"])
+            )
+        if self.summary:
+            return queryset.select_related(None).only(
+                *PatternSummarySerializer.Meta.fields
+            )
+        return queryset.defer("pattern_definition")
+
     def create(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        pattern = serializer.save()
-
-        task = Task.objects.create(
-            status="Initiated", details={"model": "Pattern", "id": pattern.id}
-        )
+        with transaction.atomic():
+            pattern = serializer.save()
+            task = Task.objects.create(
+                status="Initiated", details={"model": "Pattern", "id": pattern.id}
+            )
+            submit_on_commit(run_pattern_task, pattern.id, task.id)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -73,6 +207,45 @@ class PatternViewSet(CoreViewSet, ModelViewSet):
             headers=headers,
         )
 
+    @extend_schema(
+        description=(
+            "Add every Ansible pattern in a collection version to the service, "
+            "downloading the collection only once."
+        ),
+        request=PatternCollectionSerializer,
+        examples=[
+            api_examples.pattern_collection_post_request,
+            api_examples.pattern_collection_post_response,
+        ],
+    )
+    @action(detail=False, methods=["post"], url_path="collection")
+    def collection(self, request: Request) -> Response:
+        serializer = PatternCollectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            task = Task.objects.create(
+                status="Initiated",
+                details={"model": "Pattern", **serializer.validated_data},
+            )
+            submit_on_commit(
+                run_pattern_collection_task,
+                serializer.validated_data["collection_name"],
+                serializer.validated_data["collection_version"],
+                task.id,
+            )
+
+        return Response(
+            {
+                "task_id": task.id,
+                "message": (
+                    "Collection pattern creation initiated. Check task status for"
+                    " progress."
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -88,7 +261,7 @@ class PatternViewSet(CoreViewSet, ModelViewSet):
 )
 class ControllerLabelViewSet(CoreViewSet, ModelViewSet):
     http_method_names = ["get", "delete", "head", "options"]
-    queryset = ControllerLabel.objects.all()
+    queryset = ControllerLabel.objects.select_related("created_by", "modified_by")
     serializer_class = ControllerLabelSerializer
 
 
@@ -114,20 +287,27 @@ class ControllerLabelViewSet(CoreViewSet, ModelViewSet):
 )
 class PatternInstanceViewSet(CoreViewSet, ModelViewSet):
     http_method_names = ["get", "post", "delete", "head", "options"]
-    queryset = PatternInstance.objects.all()
+    queryset = (
+        PatternInstance.objects.select_related("created_by", "modified_by", "pattern")
+        # The pattern is only needed for its ID and summary fields
+        .defer("pattern__pattern_definition").prefetch_related("controller_labels")
+    )
     serializer_class = PatternInstanceSerializer
 
     def create(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Save initial PatternInstance
-        instance = serializer.save()
+        with transaction.atomic():
+            # Save initial PatternInstance
+            instance = serializer.save()
 
-        # Create a Task entry to track this processing
-        task = Task.objects.create(
-            status="Initiated", details={"model": "PatternInstance", "id": instance.id}
-        )
+            # Create a Task entry to track this processing
+            task = Task.objects.create(
+                status="Initiated",
+                details={"model": "PatternInstance", "id": instance.id},
+            )
+            submit_on_commit(run_pattern_instance_task, instance.id, task.id)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -154,14 +334,35 @@ class PatternInstanceViewSet(CoreViewSet, ModelViewSet):
 )
 class AutomationViewSet(CoreViewSet, ModelViewSet):
     http_method_names = ["get", "delete", "head", "options"]
-    queryset = Automation.objects.all()
+    queryset = Automation.objects.select_related(
+        "created_by", "modified_by", "pattern_instance"
+    )
     serializer_class = AutomationSerializer
 
 
 @extend_schema_view(
     list=extend_schema(
-        description="Retrieve information about all tasks created by the service.",
-        examples=[api_examples.task_get_response],
+        description=(
+            "Retrieve information about all tasks created by the service, "
+            "optionally only the status of the given tasks."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "id__in", str, description="Comma-separated list of task IDs."
+            ),
+            OpenApiParameter(
+                "status", str, enum=Task.Status.values, description="Task status."
+            ),
+            OpenApiParameter(
+                "compact",
+                bool,
+                description="Only return the ID, status and modification time.",
+            ),
+        ],
+        examples=[
+            api_examples.task_get_response,
+            api_examples.task_status_get_response,
+        ],
     ),
     retrieve=extend_schema(
         description="Retrieve information about a single task by ID.",
@@ -169,9 +370,117 @@ class AutomationViewSet(CoreViewSet, ModelViewSet):
     ),
 )
 class TaskViewSet(CoreViewSet, ReadOnlyModelViewSet):
-    queryset = Task.objects.all()
+    queryset = Task.objects.select_related("created_by", "modified_by")
     serializer_class = TaskSerializer
 
+    @property
+    def compact(self) -> bool:
+        return self.request.query_params.get("compact", "").lower() in ("1", "true")
+
+    def get_serializer_class(self) -> type[BaseSerializer]:
+        if self.action == "list" and self.compact:
+            return TaskStatusSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self) -> QuerySet[Task]:
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        if "id__in" in params:
+            try:
+                ids = [int(pk) for pk in params["id__in"].split(",") if pk.strip()]
+            except ValueError:
+                raise ValidationError({"id__in": ["A list of integers is required."]})
+            queryset = queryset.filter(id__in=ids)
+        if "status" in params:
+            if params["status"] not in Task.Status.values:
+                raise ValidationError(
+                    {"status": [f"Must be one of {Task.Status.values}."]}
+                )
+            queryset = queryset.filter(status=params["status"])
+        if self.compact:
+            queryset = queryset.select_related(None).only("id", "status", "modified")
+        return queryset
+
+
+TERMINAL_TASK_STATUSES = (Task.Status.COMPLETED, Task.Status.FAILED)
+
+
+async def _get_task(pk: int) -> Task:
+    try:
+        task: Task = await Task.objects.aget(pk=pk)
+    except Task.DoesNotExist:
+        raise Http404("No Task matches the given query.")
+    return task
+
+
+async def _serialize_task(task: Task) -> Dict[str, Any]:
+    return await sync_to_async(lambda: dict(TaskSerializer(task).data))()
+
+
+async def task_wait(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Long-polls a task: responds as soon as the task reaches a terminal status,
+    or with its current state after ``timeout`` seconds.
+
+    The wait is woken up by Postgres notifications; the task is re-read at
+    least every TASK_WAIT_POLL_INTERVAL seconds in case one is missed.
+    """
+    try:
+        timeout = float(request.GET.get("timeout", settings.TASK_WAIT_DEFAULT_TIMEOUT))
+    except ValueError:
+        timeout = math.nan
+    # NaN would never reach the deadline
+    if not math.isfinite(timeout):
+        return JsonResponse({"timeout": ["A valid number is required."]}, status=400)
+    timeout = min(timeout, settings.TASK_WAIT_MAX_TIMEOUT)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(timeout, 0)
+    async with task_status_changes(pk) as changes:
+        task = await _get_task(pk)
+        while task.status not in TERMINAL_TASK_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await changes.wait(min(remaining, settings.TASK_WAIT_POLL_INTERVAL))
+            task = await _get_task(pk)
+
+    return JsonResponse(await _serialize_task(task))
+
+
+async def task_events(request: HttpRequest, pk: int) -> StreamingHttpResponse:
+    """
+    Streams the status transitions of a task as server-sent events, ending
+    the stream once the task reaches a terminal status.
+    """
+    await _get_task(pk)
+
+    async def stream() -> AsyncIterator[str]:
+        async with task_status_changes(pk) as changes:
+            last_seen = None
+            while True:
+                task = await _get_task(pk)
+                if (task.status, task.details) != last_seen:
+                    last_seen = (task.status, task.details)
+                    data = json.dumps(
+                        await _serialize_task(task), cls=DjangoJSONEncoder
+                    )
+                    yield f"event: {task.status.lower()}\ndata: {data}\n\n"
+                if task.status in TERMINAL_TASK_STATUSES:
+                    return
+                if not await changes.wait(settings.TASK_WAIT_POLL_INTERVAL):
+                    # Keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+
+    return StreamingHttpResponse(
+        stream(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @extend_schema(exclude=True)
 @api_view(["GET"])
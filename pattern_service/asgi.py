@@ -3,14 +3,23 @@ ASGI config for pattern_service project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the API with an ASGI server to make use of the async task wait and
+event stream endpoints: waiting clients then hold no worker thread, and share
+one LISTEN connection per process.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pattern_service.settings")
 
 application = get_asgi_application()
+if settings.DEBUG:
+    # Serve the admin and API browser assets in development, like runserver
+    application = ASGIStaticFilesHandler(application)
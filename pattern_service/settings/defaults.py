@@ -111,6 +111,32 @@ DATABASES = {
     "dispatcher": {},
 }
 
+# Minimum number of seconds between two writes of a running task's progress;
+# terminal states and hand-offs between workers are always written at once
+TASK_PROGRESS_FLUSH_INTERVAL = 5
+
+# Long-polling of tasks (tasks/<id>/wait/ and tasks/<id>/events/): the default
+# and maximum wait in seconds, and how often a waiting request re-reads the
+# task in case a status notification was missed
+TASK_WAIT_DEFAULT_TIMEOUT = 30
+TASK_WAIT_MAX_TIMEOUT = 60
+TASK_WAIT_POLL_INTERVAL = 5
+
+# Completed and failed tasks older than TASK_RETENTION_DAYS are archived to
+# TASK_ARCHIVE_DIR (None to skip archiving) and deleted, TASK_PRUNE_BATCH_SIZE
+# rows per transaction, every TASK_PRUNE_INTERVAL seconds
+TASK_RETENTION_DAYS = 30
+TASK_PRUNE_BATCH_SIZE = 1000
+TASK_PRUNE_INTERVAL = 3600
+TASK_ARCHIVE_DIR = "/var/tmp/pattern-service/task-archive"
+
+# Pattern instances waiting for their controller project to sync are checked
+# together by one watcher task: the poll interval, the number of projects per
+# list request and how long (in seconds) a sync may take before failing
+PROJECT_SYNC_POLL_INTERVAL = 5
+PROJECT_SYNC_BATCH_SIZE = 200
+PROJECT_SYNC_TIMEOUT = 600
+
 DISPATCHER_CONFIG = {
     "version": 2,
     "service": {
@@ -133,12 +159,78 @@ DISPATCHER_CONFIG = {
         },
         "socket": {"socket_path": "pattern_service_dispatcher.sock"},
     },
+    "producers": {
+        "ScheduledProducer": {
+            "task_schedule": {
+                "core.task_runner.watch_project_syncs": {
+                    "schedule": PROJECT_SYNC_POLL_INTERVAL,
+                    "on_duplicate": "discard",
+                },
+                "core.task_runner.prune_old_tasks": {
+                    "schedule": TASK_PRUNE_INTERVAL,
+                    "on_duplicate": "discard",
+                },
+            }
+        }
+    },
     "publish": {"default_control_broker": "socket", "default_broker": "pg_notify"},
 }
 
+# Connection pooling for the long-lived AAP session of each worker process:
+# the number of host pools to keep, and the connections kept per host
+AAP_HTTP_POOL_CONNECTIONS = 10
+AAP_HTTP_POOL_SIZE = 10
+AAP_HTTP_POOL_BLOCK = False
+
+# Maximum number of controller resources created at the same time while
+# provisioning a single pattern instance
+INSTANCE_PROVISIONING_CONCURRENCY = 4
+
+# Maximum number of role assignment requests sent at the same time
+ROLE_ASSIGNMENT_CONCURRENCY = 8
+
+# Lifetime in seconds of cached role definition IDs, and optionally the alias
+# of a Django cache (see CACHES) shared between worker processes
+ROLE_DEFINITION_CACHE_TTL = 3600
+ROLE_DEFINITION_CACHE_BACKEND = None
+
+# Same for the IDs of controller labels, cached by organization and name
+LABEL_CACHE_TTL = 3600
+LABEL_CACHE_BACKEND = None
+
+# Maximum number of pattern versions whose provisioning plan is kept in the
+# memory of each worker process
+PROVISIONING_PLAN_CACHE_SIZE = 128
+
+# On-disk cache for collection artifacts downloaded from automation hub
+ARTIFACT_CACHE_DIR = "/var/tmp/pattern-service/artifacts"
+ARTIFACT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+# Revalidate cached artifacts with a conditional GET (ETag/Last-Modified)
+ARTIFACT_CACHE_REVALIDATE = True
+# Read single files straight from the automation hub response when the
+# artifact is not cached yet, instead of downloading the whole tarball first.
+# Streamed reads don't fill the artifact cache, so every read of an uncached
+# version goes back to automation hub; only enable this when versions are
+# rarely read more than once
+ARTIFACT_STREAM_ON_MISS = False
+
+# JSON schema that pattern definitions are validated against
+PATTERN_SCHEMA_PATH = (
+    BASE_DIR.parent / "specifications" / "pattern-schema" / "pattern-schema-dev.json"
+)
+
+# Default and maximum page sizes of the API lists, which are only paginated
+# when a ?cursor= or ?page_size= is given
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Pattern Service API",
     "DESCRIPTION": "Pattern Service API Specification",
     "VERSION": "v1",
     "SCHEMA_PATH_PREFIX": "/api/pattern-service/v1/",
+    "POSTPROCESSING_HOOKS": [
+        "drf_spectacular.hooks.postprocess_schema_enums",
+        "core.openapi.add_task_wait_paths",
+    ],
 }